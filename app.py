@@ -14,30 +14,143 @@ $ flask run
 """
 
 import os
+from typing import Iterator
 from pathlib import Path
-from flask import Flask, request, send_from_directory, render_template
+from flask import Flask, Response, request, send_from_directory, render_template, url_for
 import random
 import json
-
-from ingredient import AllIngredientsByName, Ingredient, get_best_ingredients, get_ingredients_by_filter, get_ingredient_by_name, get_ingredients_with_effect
-from effect import AllEffectsByName, get_effect_by_name, get_effects_by_filter
-from potion import Potion
+import numpy as np
+
+from ingredient import AllIngredientsByName, Ingredient, IngredientListing, IngredientSortKeys, get_best_ingredients, get_farmable_ingredients, get_ingredient_by_name, get_ingredients_with_effect
+from effect import AllEffectsByName, EffectListing, EffectSortKeys, get_effect_by_name
+from potion import Potion, PotionList
+from catalog import Catalog
+from brew_cache import BrewCache
+from brew_session import BrewSession, BrewSessions
+from http_cache import ResponseCache
+from planner import parse_inventory, plan_brewing
+from pricing import Pricing, PriceTable
+from freeze import FrozenSite
+from paging import Cursor, page_potions
+from batch import BatchBrewer, parse_batch
 
 NOT_FOUND_MESSAGE = "Not Found"
 NOT_FOUND_STATUS = 404
 DEFAULT_PORT = 5000
+SUGGEST_LIMIT = 10
+
+# Processes to use for heavy brews the catalog can't answer (1 means brew in-process)
+BREW_WORKERS = int(os.environ.get('BREW_WORKERS', 1))
+
+# Threads to brew a batch's ingredient sets on (None for the default, see batch.py)
+BATCH_WORKERS = int(os.environ['BATCH_WORKERS']) if 'BATCH_WORKERS' in os.environ else None
+
+# Recently brewed selections the catalog can't answer, keyed by ingredient set
+brew_cache = BrewCache(max_entries=256)
+
+def brew_selection(ingredients: list[Ingredient | str]):
+    """Get the potions for a selection of ingredients, highest value first, as a lazy
+    list.  Answered from the catalog when it covers the selection, otherwise brewed
+    (through the brew cache).
+    """
+    if potion_catalog is not None and potion_catalog.covers(ingredients):
+        return potion_catalog.select(ingredients)
+    return brew_cache.brew(ingredients)
+
+# Rendered pages that only depend on the data and the query string, keyed on the
+# data version so reloading the data never serves a stale page
+response_cache = ResponseCache(version=lambda: (AllEffectsByName.version, AllIngredientsByName.version))
+
+# Brewing sessions for selections that are changed one ingredient at a time, by token
+brew_sessions = BrewSessions(max_entries=256)
+
+def session_response(token: str, session: BrewSession, **extra) -> str:
+    """The JSON for a brewing session: its token, ingredients and potions (the best
+    `limit` of them, if the request gives a limit).
+    """
+    potions = session.potions()
+    limit = int(request.args['limit']) if 'limit' in request.args else None
+    return json.dumps(dict(
+        token=token,
+        ingredients=[ingredient.name for ingredient in session.ingredients],
+        potions=[potion.model_dump() for potion in potions[:limit]],
+        total_potions=len(potions),
+        **extra,
+    ))
+
+def get_cursor(args, pricing: Pricing = None) -> Cursor | None:
+    """Get the pagination cursor from the query string ('after'), or None for the first
+    page.  Raises ValueError for a malformed cursor, or one used with pricing (pages
+    are in value order, and priced lists are in price order).
+    """
+    if not args.get('after'):
+        return None
+    if pricing is not None:
+        raise ValueError("Cursor pagination ('after') is by value, so it can't be combined with pricing")
+    return Cursor.parse(args['after'])
+
+# Query parameters for pricing potions for a character (see pricing.py)
+PRICING_PARAMS = ('skill', 'alchemist', 'physician', 'benefactor', 'poisoner', 'fortify_alchemy')
+
+def get_pricing(args) -> Pricing | None:
+    """Get the character's pricing parameters from the query string, or None if none
+    were given.  Raises ValueError for bad values.
+    """
+    if not any(name in args for name in PRICING_PARAMS):
+        return None
+    def flag(name):
+        return args.get(name, 'false').lower() in ('1', 'true', 'yes')
+    return Pricing(
+        skill=int(args.get('skill', Pricing().skill)),
+        alchemist=int(args.get('alchemist', 0)),
+        physician=flag('physician'),
+        benefactor=flag('benefactor'),
+        poisoner=flag('poisoner'),
+        fortify_alchemy=float(args.get('fortify_alchemy', 0)),
+    ).validate()
+
+def price_order(selection: PotionList, pricing: Pricing, limit: int = None) -> tuple[list[int], list[float]]:
+    """Reprice every potion in a selection for a character, in one vectorized pass, and
+    get the indexes of the best `limit` of them by price (ties keep brew order) with
+    their prices.  No Potion is built.
+    """
+    prices = PriceTable(selection.table).price_potions(selection, pricing)
+    order = np.argsort(-prices, kind='stable')[:limit]
+    return order.tolist(), prices[order].tolist()
+
+def price_selection(selection: PotionList, pricing: Pricing, limit: int = None) -> tuple[list[Potion], list[float]]:
+    """Get the best `limit` potions of a selection by price, with their prices."""
+    order, prices = price_order(selection, pricing, limit)
+    return [selection[index] for index in order], prices
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_stream() -> bool:
+    """True if the client asked for newline-delimited JSON, with ?stream=1 or an Accept
+    header that prefers it to JSON.
+    """
+    if request.args.get('stream', 'false').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def ndjson_response(records: Iterator[dict], headers: dict) -> Response:
+    """Stream records as newline-delimited JSON, one per line, as they're produced."""
+    return Response((json.dumps(record) + '\n' for record in records), mimetype=NDJSON_MIMETYPE, headers=headers)
 
-# better place for these predicate functions?
-def pred_true(_):
-    return True
+app = Flask(__name__)
 
-def pred_and(*predicates):
-    return lambda x: all(predicate(x) for predicate in predicates)
+# The prebuilt potion catalog (see catalog.py), memory-mapped and shared between
+# workers.  None if it hasn't been built for the current data, in which case we brew.
+potion_catalog = Catalog.open()
 
-def pred_or(*predicates):
-    return lambda x: any(predicate(x) for predicate in predicates)
+# The frozen static site (see freeze.py), served in place of the pages it holds.  None
+# if it hasn't been frozen from the current data and code, in which case we render.
+frozen_site = FrozenSite.open()
 
-app = Flask(__name__)
+@app.before_request
+def serve_frozen():
+    if frozen_site is not None:
+        return frozen_site.serve()
 
 @app.route('/favicon.ico')
 def favicon():
@@ -51,6 +164,9 @@ def home():
 
 @app.route("/reload")
 def reload():
+    brew_cache.clear()
+    brew_sessions.clear()
+    response_cache.clear()
     Path("app.py").touch()
     return render_template('index.html', message="Reloading...")
 
@@ -61,52 +177,47 @@ def skyrim():
 
 
 @app.route("/skyrim/ingredients")
+@response_cache.cached()
 def skyrim_ingredients():
-    predicate = pred_true
-    
+    # Filters intersect the listing's posting lists, and the sort walks a presorted order
+    listing = IngredientListing.data
+    selected = listing.all
+    scores = None
+
     # Farmable filter
     if 'farmable' in request.args:
         farmable = { "True":True, "true":True }.get(request.args.get("farmable"), False)
-        predicate = pred_and(predicate, lambda ingredient: ingredient.farmable == farmable)
+        selected &= listing.match('farmable', farmable)
 
-    # Add search functionality
-    if 'search' in request.args:
-        search_terms = [term.strip().lower() for term in request.args.get('search').split(' ')]
-        predicate = pred_and(predicate, lambda ingredient: any(term in ingredient.name.lower() for term in search_terms))
+    # Add search functionality (names and categories)
+    if request.args.get('search', '').strip():
+        found, scores = listing.search(request.args.get('search'))
+        selected &= found
 
     # Add category filter functionality
     if 'category' in request.args:
-        category = request.args.get('category')
-        predicate = pred_and(predicate, lambda ingredient: ingredient.category == category)
+        selected &= listing.match('category', request.args.get('category'))
     
     # Add category prefix filter functionality
     elif 'category_prefix' in request.args:
         prefix = request.args.get('category_prefix')
-        predicate = pred_and(predicate, lambda ingredient: ingredient.category and ingredient.category.startswith(prefix))
+        selected &= listing.match_any('category', lambda category: category is not None and category.startswith(prefix))
 
     # Get sort parameters
     sortby = request.args.get('sortby', 'name')
     direction = request.args.get('direction', 'asc')
     reverse = direction == 'desc'
 
-    # Set sort function based on sortby
-    if sortby == 'name':
-        sort = lambda ingredient: ingredient.name
-    elif sortby == 'category':
-        sort = lambda ingredient: ingredient.category or ""  # Handle None values when sorting
-    elif sortby == 'value':
-        sort = lambda ingredient: ingredient.value
-    elif sortby == 'weight':
-        sort = lambda ingredient: ingredient.weight
+    # Search results are ranked by relevance unless a sort order was asked for
+    if scores is not None and 'sortby' not in request.args:
+        ingredients = listing.ranked(selected, scores)
     else:
-        sort = lambda ingredient: ingredient.name
-
-    ingredients = get_ingredients_by_filter(predicate)
-    ingredients.sort(key=sort, reverse=reverse)
+        ingredients = listing.select(selected, sortby if sortby in IngredientSortKeys else 'name', reverse)
     return render_template('ingredients.html', ingredients=ingredients, sortby=sortby, direction=direction)
 
 
 @app.route("/skyrim/ingredients/<string:name>")
+@response_cache.cached()
 def skyrim_ingredient(name):
     try:
         item = get_ingredient_by_name(name)
@@ -116,6 +227,7 @@ def skyrim_ingredient(name):
 
 
 @app.route("/skyrim/effects")
+@response_cache.cached()
 def skyrim_effects():
     sortby = request.args.get('sortby', 'name')
     direction = request.args.get('direction', 'asc')
@@ -123,39 +235,38 @@ def skyrim_effects():
     search_query = request.args.get('search', '').lower()
     effect_type = request.args.get('type', '').lower()
     school = request.args.get('school', '').lower()
-    pred = pred_true
+    listing = EffectListing.data
+    selected = listing.all
+    scores = None
     
     # Set a default title
     page_title = "EFFECTS"
 
-    if search_query:
-        search_terms = [term.strip().lower() for term in search_query.split(' ')]
-        pred = pred_and(pred, lambda effect: any(term in effect.name.lower() for term in search_terms) or any(term in effect.description.lower() for term in search_terms))
+    if search_query.strip():
+        found, scores = listing.search(search_query)
+        selected &= found
 
     if effect_type:
-        pred = pred_and(pred, lambda effect: effect.type.lower() == effect_type)
+        selected &= listing.match('type', effect_type)
         # Update title for type filter
         page_title = f"{effect_type.upper()} EFFECTS"
 
     if school:
-        pred = pred_and(pred, lambda effect: effect.school.lower() == school)
+        selected &= listing.match('school', school)
         # School filter takes precedence over type filter for the title
         page_title = f"{school.upper()} EFFECTS"
 
-    sort_keys = {
-        'name': lambda effect: effect.name,
-        'description': lambda effect: effect.description,
-        'school': lambda effect: effect.school,
-        'type': lambda effect: effect.type,
-        'cost': lambda effect: effect.cost,
-    }
-    sort = sort_keys.get(sortby, sort_keys['name'])
-    effects = sorted(get_effects_by_filter(pred), key=sort, reverse=reverse)
+    # Search results are ranked by relevance unless a sort order was asked for
+    if scores is not None and 'sortby' not in request.args:
+        effects = listing.ranked(selected, scores)
+    else:
+        effects = listing.select(selected, sortby if sortby in EffectSortKeys else 'name', reverse)
 
     return render_template('effects.html', effects=effects, sortby=sortby, direction=direction, page_title=page_title)
 
 
 @app.route("/skyrim/effects/<string:name>")
+@response_cache.cached()
 def skyrim_effect(name):
     try:
         item = get_effect_by_name(name)
@@ -171,13 +282,155 @@ def skyrim_potions_api():
         return json.dumps({'error': "Missing required 'ingredients' parameter"}), 400
     ingredient_names = ingredients_param.split(',')
     try:
-        potions = Potion.brew(ingredient_names)
+        pricing = get_pricing(request.args)
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        after = get_cursor(request.args, pricing)
+        potions = brew_selection(Potion.resolve_ingredients(ingredient_names))
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+    # Streamed: one potion per line, built as it's written, so nothing is held in
+    # memory and the first potion goes out right away.  The totals go in the headers.
+    if wants_stream():
+        headers = {'X-Total-Potions': str(len(potions))}
+        if pricing is None:
+            page, next_cursor = page_potions(potions, limit, after)
+            if next_cursor is not None:
+                headers['X-Next-Cursor'] = str(next_cursor)
+            return ndjson_response((potion.model_dump() for potion in page), headers)
+        order, prices = price_order(potions, pricing, limit)
+        return ndjson_response(
+            (dict(potions[index].model_dump(), price=price) for index, price in zip(order, prices)), headers)
+    if pricing is None:
+        # Paged by value: a page of up to `limit` potions after the cursor
+        page, next_cursor = page_potions(potions, limit, after)
+        return json.dumps({
+            'potions': [potion.model_dump() for potion in page],
+            'ingredients': ingredient_names,
+            'total_potions': len(potions),
+            'next': str(next_cursor) if next_cursor is not None else None,
+        })
+    page, prices = price_selection(potions, pricing, limit)
+    return json.dumps({
+        'potions': [dict(potion.model_dump(), price=price) for potion, price in zip(page, prices)],
+        'ingredients': ingredient_names,
+        'pricing': pricing._asdict(),
+        'total_potions': len(potions),
+    })
+
+
+@app.route('/api/skyrim/potions/batch', methods=['POST'])
+def skyrim_potions_batch_api():
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+    results = BatchBrewer(catalog=potion_catalog, workers=BATCH_WORKERS).run(items)
+    return json.dumps({'results': results})
+
+
+@app.route('/api/skyrim/recipes', methods=['GET'])
+def skyrim_recipes_api():
+    effects_param = request.args.get('effects')
+    if not effects_param:
+        return json.dumps({'error': "Missing required 'effects' parameter"}), 400
+    effect_names = effects_param.split(',')
+    exclude = [name for name in request.args.get('exclude', '').split(',') if name]
+    try:
+        max_cost = float(request.args['max_cost']) if 'max_cost' in request.args else None
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        recipes = Potion.find_recipes(
+            effect_names,
+            farmable=request.args.get('farmable', 'false').lower() in ('1', 'true', 'yes'),
+            exclude=exclude,
+            max_cost=max_cost,
+            sort_by=request.args.get('sortby', 'value'),
+            limit=limit,
+        )
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+    return json.dumps({'potions': [potion.model_dump() for potion in recipes], 'effects': effect_names})
+
+
+@app.route('/api/skyrim/plan', methods=['GET'])
+def skyrim_plan_api():
+    inventory_param = request.args.get('inventory')
+    if not inventory_param:
+        return json.dumps({'error': "Missing required 'inventory' parameter"}), 400
+    try:
+        plan = plan_brewing(parse_inventory(inventory_param.split(',')))
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+    return json.dumps({
+        'steps': [{'potion': step.potion.model_dump(), 'count': step.count} for step in plan.steps],
+        'value': plan.value,
+        'leftovers': plan.leftovers,
+    })
+
+
+@app.route('/api/skyrim/sessions', methods=['POST'])
+def skyrim_sessions_api():
+    ingredients_param = request.values.get('ingredients', '')
+    try:
+        token, session = brew_sessions.create([name for name in ingredients_param.split(',') if name])
+        return session_response(token, session)
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+
+
+@app.route('/api/skyrim/sessions/<string:token>', methods=['GET'])
+def skyrim_session_api(token):
+    session = brew_sessions.get(token)
+    if session is None:
+        return json.dumps({'error': f"Unknown session: {token}"}), NOT_FOUND_STATUS
+    try:
+        return session_response(token, session)
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+
+
+@app.route('/api/skyrim/sessions/<string:token>/ingredients/<string:name>', methods=['POST', 'DELETE'])
+def skyrim_session_ingredient_api(token, name):
+    session = brew_sessions.get(token)
+    if session is None:
+        return json.dumps({'error': f"Unknown session: {token}"}), NOT_FOUND_STATUS
+    try:
+        if request.method == 'POST':
+            return session_response(token, session, added=session.add(name))
+        return session_response(token, session, removed=session.remove(name))
+    except ValueError as e:
+        return json.dumps({'error': str(e)}), 400
+
+
+@app.route('/api/skyrim/suggest', methods=['GET'])
+def skyrim_suggest_api():
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', SUGGEST_LIMIT))
     except ValueError as e:
         return json.dumps({'error': str(e)}), 400
-    return json.dumps({'potions': [potion.model_dump() for potion in potions], 'ingredients': ingredient_names})
+    # Names that start with the query first, then names with a later word that does
+    suggestions = sorted(
+        [(rank, name, 'ingredient') for rank, name in IngredientListing.data.suggest(query, limit)] +
+        [(rank, name, 'effect') for rank, name in EffectListing.data.suggest(query, limit)]
+    )[:limit]
+    return json.dumps({'query': query, 'suggestions': [
+        {
+            'name': name,
+            'type': kind,
+            'url': url_for('skyrim_ingredient' if kind == 'ingredient' else 'skyrim_effect', name=name),
+        }
+        for _, name, kind in suggestions
+    ]})
+
+
+@app.route('/api/skyrim/cache', methods=['GET'])
+def skyrim_cache_api():
+    return json.dumps(brew_cache.stats())
 
 
 @app.route('/skyrim/potions')
+# Random selections (no 'ingredients' parameter) are never cached
+@response_cache.cached(when=lambda: 'ingredients' in request.args)
 def skyrim_potions():
     # Get query parameters with defaults
     ingredients_filter = request.args.get('ingredients', 'random')
@@ -190,7 +443,7 @@ def skyrim_potions():
             if ingredients == "all":
                 return "All Potions", list(AllIngredientsByName.values())
             if ingredients == "farmable":
-                return "Farmable Potions", [ingredient for ingredient in AllIngredientsByName.values() if ingredient.farmable]
+                return "Farmable Potions", get_farmable_ingredients()
             if ingredients == "best":
                 return "Valuable Potions", get_best_ingredients()
             # Custom ingredient selection; silently skip names that don't match a known ingredient
@@ -207,23 +460,68 @@ def skyrim_potions():
             return "Random Potions", ingredients[:5]
     
     page_title, ingredients = get_ingredients()
+    try:
+        pricing = get_pricing(request.args)
+        after = get_cursor(request.args, pricing)
+        if limit < 1:
+            raise ValueError(f"Invalid limit: {limit}. Must be at least 1.")
+    except ValueError as e:
+        return str(e), 400
+    prices = None
+    next_cursor = None
     
-    # Fetch all matching potions for pagination calculations
-    all_matching_potions = Potion.brew(ingredients)
-    total_potions = len(all_matching_potions)
-    
-    # Get the limited subset of potions for display
-    potions = all_matching_potions[:limit]
+    # Only build the potions we're going to display.  Large selections and random ones
+    # (which won't repeat, so aren't worth caching) use the branch-and-bound search,
+    # which only brews what could make the top `limit` (after the cursor, if paging).
+    # Totals come from the catalog, the cached rows, or a count pass.
+    if pricing is not None:
+        # Priced for a character: reprice the whole selection and show the best by price
+        if potion_catalog is not None and potion_catalog.covers(ingredients):
+            selection = potion_catalog.select(ingredients)
+        elif ingredients_filter == 'random':
+            selection = Potion.brew_lazy(ingredients)
+        else:
+            selection = brew_cache.brew(ingredients)
+        potions, prices = price_selection(selection, pricing, limit)
+        total_potions = len(selection)
+    elif potion_catalog is not None and potion_catalog.covers(ingredients):
+        selection = potion_catalog.select(ingredients)
+        page, next_cursor = page_potions(selection, limit, after)
+        potions = list(page)
+        total_potions = len(selection)
+    elif ingredients_filter in ('all', 'random') or (BREW_WORKERS > 1 and after is None):
+        # One extra potion tells whether there's a next page
+        if ingredients_filter in ('all', 'random'):
+            potions = Potion.brew_top(ingredients, limit + 1, after=after)
+        else:
+            potions = Potion.brew_parallel(ingredients, workers=BREW_WORKERS, limit=limit + 1)
+        if len(potions) > limit:
+            potions = potions[:limit]
+            next_cursor = Cursor.of(potions[-1])
+        total_potions = Potion.count_potions(ingredients)
+    else:
+        selection = brew_cache.brew(ingredients)
+        page, next_cursor = page_potions(selection, limit, after)
+        potions = list(page)
+        total_potions = len(selection)
     
-    # Determine if results are truncated
-    is_truncated = total_potions > limit
+    # Determine if results are truncated.  Random selections can't be paged, since the
+    # next request would pick different ingredients.  Past the first page, the total
+    # counts the earlier pages too, so only a next page means there's more.
+    is_truncated = total_potions > len(potions) if after is None else next_cursor is not None
+    if ingredients_filter == 'random' or not potions:
+        next_cursor = None
     
     # Render template with pagination variables
     return render_template('potions.html', 
                           potions=potions, 
+                          prices=prices,
                           ingredients=ingredients,
                           is_truncated=is_truncated,
                           total_potions=total_potions,
+                          next_cursor=next_cursor,
+                          current_cursor=str(after) if after is not None else None,
+                          pricing_args={name: request.args[name] for name in PRICING_PARAMS if name in request.args},
                           current_filter=ingredients_filter,
                           limit=limit,
                           page_title=page_title)
@@ -231,15 +529,27 @@ def skyrim_potions():
 
 @app.route('/skyrim/potions', methods=['POST'])
 def skyrim_potions_post():
-    ingredient_names = request.form.get('ingredients', '').split(',')
-    ingredients = []
-    for name in ingredient_names:
-        try:
-            ingredients.append(get_ingredient_by_name(name))
-        except ValueError:
-            pass
-    potions = Potion.brew(ingredients)
-    return render_template('potions.html', potions=potions, ingredients=ingredients)
+    # Changing a session's selection ('add' or 'remove' one ingredient) only brews
+    # what changed; otherwise start a new session from the submitted ingredients
+    token = request.form.get('session', '')
+    session = brew_sessions.get(token)
+    if session is None:
+        ingredients = []
+        for name in request.form.get('ingredients', '').split(','):
+            try:
+                ingredients.append(get_ingredient_by_name(name))
+            except ValueError:
+                pass
+        token, session = brew_sessions.create(ingredients)
+    try:
+        if request.form.get('add'):
+            session.add(request.form['add'])
+        if request.form.get('remove'):
+            session.remove(request.form['remove'])
+    except ValueError as e:
+        return str(e), 400
+    return render_template('potions.html', potions=session.potions(), ingredients=session.ingredients,
+                           session_token=token)
 
 
 @app.route("/about")
@@ -0,0 +1,154 @@
+"""
+Batch brewing: many ingredient sets in one request.  Tools that brew thousands of
+selections pay per-request overhead and resolve the same names again and again, so
+a batch resolves each name once and brews each distinct set once, however many
+requests ask for it (in whatever order or spelling).
+
+Every set is brewed against the full ingredient table (see potion.get_full_table) as
+a mask of its ingredients, so all of them share the table's pair results, and the
+triples are shared through a memo for the whole batch.  Sets the catalog covers are
+answered from it instead.  The distinct sets are brewed on a thread pool, which
+shares the table and memo (a process pool would have to rebuild them per worker).
+
+Each request picks its own sort ('value' or 'efficiency', see RecipeSortKeys) and
+limit.  Requests that only differ by id share one result.
+
+Usage:
+    from batch import BatchBrewer, parse_batch
+    items = parse_batch({"requests": [{"id": "a", "ingredients": ["Wheat", "Garlic"], "limit": 5}]})
+    results = BatchBrewer(catalog=potion_catalog).run(items)   # id -> {"potions": [...], ...}
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import NamedTuple
+
+from brewing import PotionRow, bits_above, iter_bits, row_order
+from ingredient import get_ingredient_by_name
+from potion import Potion, PotionList, RecipeSortKeys, get_full_table
+
+# Most requests in one batch
+MAX_BATCH_REQUESTS = 10000
+# Threads to brew on, by default
+BATCH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class BatchItem(NamedTuple):
+    """One request in a batch: its id, ingredient names, limit, and sort key."""
+    id: str
+    ingredients: tuple[str, ...]
+    limit: int | None = None
+    sortby: str = 'value'
+
+
+def parse_batch(body) -> list[BatchItem]:
+    """Parse a batch request body: {"requests": [{"id", "ingredients", "limit", "sortby"}]}.
+    Ids default to the request's position.  Raises ValueError if it's malformed.
+    """
+    requests = body.get('requests') if isinstance(body, dict) else None
+    if not isinstance(requests, list):
+        raise ValueError("Expected a JSON object with a 'requests' list")
+    if len(requests) > MAX_BATCH_REQUESTS:
+        raise ValueError(f"Too many requests: {len(requests)}. At most {MAX_BATCH_REQUESTS} per batch.")
+    items = []
+    ids = set()
+    for position, request in enumerate(requests):
+        if not isinstance(request, dict) or not isinstance(request.get('ingredients'), list):
+            raise ValueError(f"Request {position} needs an 'ingredients' list")
+        item = BatchItem(
+            id=str(request.get('id', position)),
+            ingredients=tuple(str(name) for name in request['ingredients']),
+            limit=request.get('limit'),
+            sortby=request.get('sortby', 'value'),
+        )
+        if item.id in ids:
+            raise ValueError(f"Duplicate request id: {item.id}")
+        if item.limit is not None and (isinstance(item.limit, bool) or not isinstance(item.limit, int) or item.limit < 0):
+            raise ValueError(f"Invalid limit for request {item.id}: {item.limit}")
+        if item.sortby not in RecipeSortKeys:
+            raise ValueError(f"Invalid sortby for request {item.id}: {item.sortby}. Must be one of {', '.join(RecipeSortKeys)}")
+        ids.add(item.id)
+        items.append(item)
+    return items
+
+
+class BatchBrewer:
+    """Brews the ingredient sets of a batch, sharing work between them."""
+
+    def __init__(self, catalog=None, workers: int = None):
+        self.catalog = catalog
+        self.workers = workers or BATCH_WORKERS
+        self.table = get_full_table()
+        # Table index by ingredient name, None for ingredients not valid for potions
+        self.indexes: dict[str, int | None] = {}
+        # Rows brewed so far in the batch, by combination
+        self.memo: dict[tuple[int, ...], PotionRow] = {}
+
+    def resolve(self, names: tuple[str, ...]) -> int:
+        """Get the mask of a set of ingredient names.  Raises ValueError for unknown names."""
+        selected = 0
+        for name in names:
+            if name not in self.indexes:
+                ingredient = get_ingredient_by_name(name)
+                self.indexes[name] = self.table.indexes.get(ingredient.name) if Potion.is_valid_ingredient(ingredient) else None
+            index = self.indexes[name]
+            if index is not None:
+                selected |= 1 << index
+        return selected
+
+    def row(self, combo: tuple[int, ...]) -> PotionRow:
+        row = self.memo.get(combo)
+        if row is None:
+            row = self.memo[combo] = self.table.row(combo, self.table.shared_mask(combo))
+        return row
+
+    def brew(self, selected: int) -> PotionList:
+        """Brew the potions of a set of ingredients (a mask of table indexes), highest
+        value first.
+        """
+        names = [self.table.ingredients[index].name for index in iter_bits(selected)]
+        if self.catalog is not None and self.catalog.covers(names):
+            return self.catalog.select(names)
+        table = self.table
+        rows = []
+        for a in iter_bits(selected):
+            for b in iter_bits(bits_above(table.neighbors[a] & selected, a)):
+                rows.append(self.row((a, b)))
+            rows.extend(self.row(combo) for combo in table.triples(a, selected))
+        rows.sort(key=row_order)
+        return PotionList(table, rows)
+
+    @staticmethod
+    def result(potions: PotionList, sortby: str, limit: int | None) -> dict:
+        """Get one request's result: its best `limit` potions by `sortby`, and the total."""
+        if sortby == 'value':
+            selected = potions[:limit]
+        else:
+            key = RecipeSortKeys[sortby]
+            rows = sorted(potions.rows, key=lambda row: (-key(row), row_order(row)))[:limit]
+            selected = PotionList(potions.table, rows)
+        return {'potions': [potion.model_dump() for potion in selected], 'total_potions': len(potions)}
+
+    def run(self, items: list[BatchItem]) -> dict[str, dict]:
+        """Run a batch and get each request's result (or {'error': ...}) by id."""
+        results: dict[str, dict] = {}
+        # Requests by ingredient set, then by (sortby, limit)
+        sets: dict[int, dict[tuple, list[str]]] = {}
+        for item in items:
+            try:
+                selected = self.resolve(item.ingredients)
+            except ValueError as e:
+                results[item.id] = {'error': str(e)}
+                continue
+            sets.setdefault(selected, {}).setdefault((item.sortby, item.limit), []).append(item.id)
+
+        def evaluate(selected: int) -> list[tuple[list[str], dict]]:
+            potions = self.brew(selected)
+            return [(ids, self.result(potions, sortby, limit)) for (sortby, limit), ids in sets[selected].items()]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for evaluated in executor.map(evaluate, sets):
+                for ids, result in evaluated:
+                    for id in ids:
+                        results[id] = result
+        return {item.id: results[item.id] for item in items}
@@ -0,0 +1,152 @@
+"""
+Branch-and-bound search for the most valuable potions.  Rather than brewing every
+combination and keeping the best, the combination space is explored best-first
+from upper bounds on what each part of it can be worth, and any part that can't
+beat the current K-th best potion is never brewed.
+
+A potion's value is the sum of its active effects' value products.  For a pair
+(a, b) that's the pair table value P(a, b).  For a triple, an effect shared by
+exactly two ingredients is counted in that pair's value, and an effect shared by
+all three is the pair's product times the third ingredient's multiplier.  So with
+Q(a, b) being P(a, b) with every effect scaled by the largest multiplier any
+ingredient has for it (at least 1):
+
+    value(a, b, c) <= Q(a, b) + P(a, c) + P(b, c)
+
+Branches follow BrewTable.triples: per first ingredient a, its pairs, the triples
+(a, b, c) where a and b share an effect, and the triples (a, b, c) where only c
+shares with a (then b and a share nothing, so the value is P(a, c) + P(b, c)).
+
+Usage:
+    from bounds import best_rows
+    rows = best_rows(BrewTable(ingredients), 10)
+"""
+
+import heapq
+from itertools import count
+
+from brewing import BrewTable, PotionRow, bits_above, iter_bits, iterate, row_order
+
+# Bounds are summed in a different order than potion values, so allow for rounding
+SLACK = 1e-9
+
+
+class BoundTable:
+    """Upper bounds on potion value for the branches of a BrewTable's combination
+    space.  Every bound is at least the value of every potion in its branch.
+    """
+
+    def __init__(self, table: BrewTable):
+        self.table = table
+        n = len(table)
+        best_values: dict[int, float] = {}
+        for values in table.values:
+            for bit, value in values.items():
+                best_values[bit] = max(best_values.get(bit, 1.0), value)
+        # Per pair: its exact value P and the all-three allowance Q
+        self.p: dict[tuple[int, int], float] = {}
+        self.q: dict[tuple[int, int], float] = {}
+        self.best_p = [0.0] * n
+        self.best_q = [0.0] * n
+        for combo, pair in table.pair_table.items():
+            q = sum(value * best_values[bit] for bit, (_, value) in pair.products.items())
+            self.p[combo] = pair.value
+            self.q[combo] = q
+            for index in combo:
+                self.best_p[index] = max(self.best_p[index], pair.value)
+                self.best_q[index] = max(self.best_q[index], q)
+        # best_p_above[i]: the best pair value of any ingredient after i
+        self.best_p_above = [0.0] * (n + 1)
+        for index in range(n - 1, -1, -1):
+            self.best_p_above[index] = max(self.best_p[index], self.best_p_above[index + 1])
+
+    def first(self, a: int) -> float:
+        """Bound every potion whose first ingredient is `a`."""
+        return self.best_q[a] + self.best_p[a] + self.best_p_above[a + 1]
+
+    def sharing(self, a: int, b: int) -> float:
+        """Bound the triples (a, b, c) where a and b share an effect."""
+        return self.q[(a, b)] + self.best_p[a] + self.best_p[b]
+
+    def bridged(self, a: int, c: int) -> float:
+        """Bound the triples (a, b, c) where b shares an effect only with c."""
+        return self.p[(a, c)] + self.best_p[c]
+
+    def sharing_bound(self, a: int, b: int) -> float:
+        """Bound every triple with both a and b (a < b), whether or not they share."""
+        return self.q.get((a, b), 0.0) + self.best_p[a] + self.best_p[b]
+
+    def triple_bound(self, a: int, b: int, c: int) -> float:
+        """Bound the triple (a, b, c), with a < b < c."""
+        return self.q.get((a, b), 0.0) + self.p.get((a, c), 0.0) + self.p.get((b, c), 0.0)
+
+
+def best_rows(table: BrewTable, limit: int, after: tuple = None, track=iterate) -> list[PotionRow]:
+    """Get the best `limit` PotionRows of a BrewTable, in brew order, so the same rows
+    as sorting every row by row_order and keeping the first `limit`.  If `after` (a
+    row_order key) is given, only rows that sort after it are counted, which gives
+    the next page of a paged listing.  The track hook is advanced once per first
+    ingredient searched, so it stops short when the rest can't make the top `limit`.
+    """
+    if limit <= 0:
+        return []
+    bounds = BoundTable(table)
+    neighbors = table.neighbors
+    # Entries are (-bound, 0, seq, branch) or (-value, 1, len, combo, row).  Branches sort
+    # ahead of rows with the same value, since they may hold a row that comes first.
+    heap = []
+    seq = count()
+    # Values of the best `limit` rows pushed so far; the smallest is the bar to beat
+    kth: list[float] = []
+
+    def bar() -> float:
+        return kth[0] if len(kth) == limit else float('-inf')
+
+    def push_branch(bound: float, branch: tuple):
+        bound += SLACK * (1 + bound)
+        if bound >= bar():
+            heapq.heappush(heap, (-bound, 0, next(seq), branch))
+
+    def push_row(row: PotionRow):
+        if row.value < bar() or (after is not None and row_order(row) <= after):
+            return
+        if len(kth) == limit:
+            heapq.heapreplace(kth, row.value)
+        else:
+            heapq.heappush(kth, row.value)
+        heapq.heappush(heap, (-row.value, 1, len(row.combo), row.combo, row))
+
+    for a in range(len(table)):
+        push_branch(bounds.first(a), ('first', a))
+
+    rows: list[PotionRow] = []
+
+    def search():
+        """Run the search, yielding each first ingredient as its branch is expanded."""
+        while heap and len(rows) < limit:
+            entry = heapq.heappop(heap)
+            if entry[1] == 1:
+                rows.append(entry[4])
+                continue
+            kind, *indexes = entry[3]
+            if kind == 'first':
+                a = indexes[0]
+                above_a = bits_above(neighbors[a], a)
+                for b in iter_bits(above_a):
+                    push_row(table.row((a, b), table.pair_table[(a, b)].mask))
+                    push_branch(bounds.sharing(a, b), ('sharing', a, b))
+                for c in iter_bits(above_a):
+                    push_branch(bounds.bridged(a, c), ('bridged', a, c))
+                yield a
+            elif kind == 'sharing':
+                a, b = indexes
+                for c in iter_bits(bits_above(neighbors[a] | neighbors[b], b)):
+                    push_row(table.row((a, b, c), table.shared_mask((a, b, c))))
+            else:
+                a, c = indexes
+                for b in iter_bits(bits_above(neighbors[c] & ~neighbors[a] & ((1 << c) - 1), a)):
+                    push_row(table.row((a, b, c), table.shared_mask((a, b, c))))
+
+    for _ in track(search(), total=len(table), description="Brewing potions"):
+        pass
+    return rows
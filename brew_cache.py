@@ -0,0 +1,109 @@
+"""
+A bounded LRU cache in front of brewing.  The same ingredient selections ("farmable",
+"best", popular custom lists) are brewed over and over, so the results are cached by
+the set of resolved ingredient names: order and duplicates don't matter.
+
+The cache is bounded both by number of entries and by the approximate memory held by
+the cached potions and the BrewTable they keep alive (its per-ingredient encodings
+and pair table), and evicts the least recently used entries first.  Each entry
+remembers the Ingredient objects it was brewed from, so if the ingredient data is
+reloaded the stale entries are never served (and clear() drops everything at once).
+
+Usage:
+    from brew_cache import BrewCache
+    cache = BrewCache(max_entries=128)
+    potions = cache.brew(["Wheat", "Garlic"])
+    print(cache.stats())
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, NamedTuple
+
+from ingredient import Ingredient
+from potion import Potion, PotionList
+
+# Rough size of one cached potion row (tuple, combo tuple, mask, floats)
+APPROX_ROW_BYTES = 200
+# Rough size of a BrewTable's encoding of one ingredient (slots, mask, power and
+# value dicts, neighbors), and of one pair table entry (key, PairResult, products)
+APPROX_INGREDIENT_BYTES = 1700
+APPROX_PAIR_BYTES = 560
+
+
+class CacheEntry(NamedTuple):
+    ingredients: tuple[Ingredient, ...]
+    potions: PotionList
+    size: int
+
+
+class BrewCache:
+    """An LRU cache of brewed PotionLists keyed by frozenset of ingredient names."""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[frozenset[str], CacheEntry] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def approximate_size(potions: PotionList) -> int:
+        """Estimate the memory held by a brewed PotionList, including its BrewTable."""
+        table = potions.table
+        return len(potions) * APPROX_ROW_BYTES + len(table) * APPROX_INGREDIENT_BYTES + \
+            len(table.pair_table) * APPROX_PAIR_BYTES
+
+    def brew(self, ingredients: list[Ingredient | str],
+             brew: Callable[[list[Ingredient]], PotionList] = Potion.brew_lazy) -> PotionList:
+        """Get the potions for a selection of ingredients, brewing (with `brew`) on a
+        miss.  The selection is brewed in a canonical (name) order with duplicates
+        removed, so every spelling of the same set gets the same answer.
+        """
+        resolved = {ingredient.name: ingredient for ingredient in Potion.resolve_ingredients(ingredients)}
+        key = frozenset(resolved)
+        current = tuple(resolved[name] for name in sorted(resolved))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and all(a is b for a, b in zip(entry.ingredients, current)):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.potions
+            self.misses += 1
+        potions = brew(list(current))
+        size = self.approximate_size(potions)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            if size <= self.max_bytes:
+                self.entries[key] = CacheEntry(current, potions, size)
+                self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+        return potions
+
+    def clear(self):
+        """Drop every entry, e.g. after the ingredient or effect data is reloaded."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Get the cache counters."""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,174 @@
+"""
+Incremental brewing.  The potions page is used iteratively: add an ingredient, look
+at the potions, add another, take one out.  Brewing the whole selection again on
+every change repeats almost all of the work, so a BrewSession keeps the potions it
+has brewed and only brews what a change affects:
+
+    add:    the pairs and triples that include the new ingredient
+    remove: drop the potions that include the ingredient, nothing is brewed
+
+Sessions brew against the full ingredient table (see potion.get_full_table), so
+adding an ingredient is a walk over its neighbors in the adjacency graph that are
+already selected.  As with the catalog, a potion's ingredients (and potions of equal
+value) are ordered by position in the full table, not by the order they were added.
+
+BrewSessions holds the sessions for the web app, by token, and evicts the least
+recently used ones.
+
+Usage:
+    from brew_session import BrewSession
+    session = BrewSession(["Wheat", "Garlic"])
+    session.add("Blue Mountain Flower")
+    session.remove("Garlic")
+    potions = session.potions()
+"""
+
+import secrets
+from collections import OrderedDict
+from threading import Lock
+
+from brewing import BrewTable, PotionRow, iter_bits, row_order
+from ingredient import AllIngredientsByName, Ingredient, get_ingredient_by_name
+from potion import Potion, PotionList, get_full_table
+
+TOKEN_BYTES = 12
+
+
+class BrewSession:
+    """A selection of ingredients and the potions brewed from it, kept up to date as
+    ingredients are added and removed one at a time.
+    """
+
+    def __init__(self, ingredients: list[Ingredient | str] = ()):
+        self.table: BrewTable = get_full_table()
+        self.selected = 0                        # mask of selected table indexes
+        self.order: list[int] = []               # selected table indexes, as added
+        self.rows: dict[tuple[int, ...], PotionRow] = {}
+        self._sorted: list[PotionRow] = None
+        self.lock = Lock()
+        for item in ingredients:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def ingredients(self) -> list[Ingredient]:
+        """The selected ingredients, in the order they were added."""
+        return [self.table.ingredients[index] for index in self.order]
+
+    @property
+    def stale(self) -> bool:
+        """True if the ingredient data has been reloaded since the session was started."""
+        return self.table is not get_full_table()
+
+    def resolve(self, item: Ingredient | str) -> int | None:
+        """Get the table index of an ingredient, or None for one that isn't valid for
+        potion making (like Jarrin Root).  Raises ValueError for unknown names.
+        """
+        ingredient = get_ingredient_by_name(item) if isinstance(item, str) else item
+        if not Potion.is_valid_ingredient(ingredient):
+            return None
+        index = self.table.indexes.get(ingredient.name)
+        if index is None:
+            raise ValueError(f"Ingredient not found: {ingredient.name}")
+        return index
+
+    def new_combos(self, a: int) -> set[tuple[int, ...]]:
+        """Get the pairs and triples of ingredient `a` and the selected ingredients that
+        make a potion.  A triple is connected in the adjacency graph, so it always has
+        a pair (a, b) that shares an effect, and its third ingredient shares one with
+        either a or b.
+        """
+        neighbors = self.table.neighbors
+        selected = self.selected
+        combos = set()
+        for b in iter_bits(neighbors[a] & selected):
+            combos.add((a, b) if a < b else (b, a))
+            for c in iter_bits((neighbors[a] | neighbors[b]) & selected & ~(1 << b)):
+                combos.add(tuple(sorted((a, b, c))))
+        return combos
+
+    def add(self, item: Ingredient | str) -> int:
+        """Add an ingredient and brew only the potions that include it.  Returns the
+        number of potions added (0 if it was already selected or isn't valid).
+        """
+        index = self.resolve(item)
+        with self.lock:
+            if index is None or self.selected >> index & 1:
+                return 0
+            combos = self.new_combos(index)
+            for combo in combos:
+                self.rows[combo] = self.table.row(combo, self.table.shared_mask(combo))
+            self.selected |= 1 << index
+            self.order.append(index)
+            self._sorted = None
+        return len(combos)
+
+    def remove(self, item: Ingredient | str) -> int:
+        """Remove an ingredient and drop the potions that include it.  Returns the
+        number of potions removed (0 if it wasn't selected).
+        """
+        index = self.resolve(item)
+        with self.lock:
+            if index is None or not self.selected >> index & 1:
+                return 0
+            dropped = [combo for combo in self.rows if index in combo]
+            for combo in dropped:
+                del self.rows[combo]
+            self.selected &= ~(1 << index)
+            self.order.remove(index)
+            self._sorted = None
+        return len(dropped)
+
+    def potions(self) -> PotionList:
+        """Get the session's potions, highest value first, as a lazy PotionList."""
+        with self.lock:
+            if self._sorted is None:
+                self._sorted = sorted(self.rows.values(), key=row_order)
+            return PotionList(self.table, self._sorted)
+
+
+class BrewSessions:
+    """Brewing sessions by token, evicting the least recently used past max_entries."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.sessions: OrderedDict[str, BrewSession] = OrderedDict()
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def create(self, ingredients: list[Ingredient | str] = ()) -> tuple[str, BrewSession]:
+        """Start a session with a selection of ingredients and get its token."""
+        session = BrewSession(ingredients)
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        with self.lock:
+            self.sessions[token] = session
+            while len(self.sessions) > self.max_entries:
+                self.sessions.popitem(last=False)
+        return token, session
+
+    def get(self, token: str) -> BrewSession | None:
+        """Get a session by token, or None if it's unknown or has been evicted.  A
+        session started before the ingredient data was reloaded is brewed again.
+        """
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None:
+                return None
+            self.sessions.move_to_end(token)
+        if session.stale:
+            # Ingredients that are no longer in the data are dropped
+            session = BrewSession([
+                ingredient.name for ingredient in session.ingredients if ingredient.name in AllIngredientsByName
+            ])
+            with self.lock:
+                if token in self.sessions:
+                    self.sessions[token] = session
+        return session
+
+    def clear(self):
+        with self.lock:
+            self.sessions.clear()
@@ -0,0 +1,261 @@
+"""
+The brewing engine works on a compact encoding of ingredients rather than on the
+pydantic models themselves.  Every effect name is given a bit position, and each
+ingredient's effects are encoded once as an integer bitmask.  The effects shared
+by a combination of ingredients then fall out of a few AND/OR operations:
+
+    pair:   a & b
+    triple: (a & b) | (a & c) | (b & c)
+
+ActiveEffect objects are only built for the combinations that actually produce
+a potion, and they're built in exactly the same order (and with exactly the same
+products) as Ingredient.combine would have built them.
+
+Usage:
+    from brewing import BrewTable
+    table = BrewTable([get_ingredient_by_name("Wheat"), get_ingredient_by_name("Garlic")])
+    mask = table.shared_mask((0, 1))
+    print(table.active_effects((0, 1), mask))
+"""
+
+from functools import reduce
+from itertools import combinations as itertools_combinations
+from typing import NamedTuple
+from effect import AllEffectsByName
+from ingredient import Ingredient, ActiveEffect
+
+# Bit positions for effect names.  Seeded from the effect list the first time a bit
+# is needed (not at import) so the encoding is stable, and extended on demand for
+# effects that only appear on ingredients.
+EffectBits: dict[str, int] = {}
+
+
+def get_effect_bit(name: str) -> int:
+    """Get the bit position for an effect name, assigning a new one if needed."""
+    bit = EffectBits.get(name)
+    if bit is None:
+        if not EffectBits:
+            EffectBits.update((effect_name, index) for index, effect_name in enumerate(AllEffectsByName))
+            bit = EffectBits.get(name)
+        if bit is None:
+            bit = EffectBits[name] = len(EffectBits)
+    return bit
+
+
+def get_effect_mask(names) -> int:
+    """Get the bitmask for a collection of effect names."""
+    return reduce(lambda mask, name: mask | (1 << get_effect_bit(name)), names, 0)
+
+
+def iter_bits(mask: int):
+    """Yield the positions of the set bits in a mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def bits_above(bits: int, index: int) -> int:
+    """Clear the bits at and below the given position."""
+    return bits >> (index + 1) << (index + 1)
+
+
+def iterate(items, **kwargs):
+    """This is the 'non-progress bar' iterator.  Useful for embedded behavior (like web server)."""
+    return items
+
+
+class PotionRow(NamedTuple):
+    """A brewed potion in compact form.  The ingredients are indices into the BrewTable
+    that brewed it and the active effects are a bitmask, so a row is a handful of ints
+    and floats rather than a tree of pydantic models.
+    """
+    combo: tuple[int, ...]
+    mask: int
+    value: float
+    cost: float
+
+    @property
+    def num_effects(self) -> int:
+        return self.mask.bit_count()
+
+
+def row_order(row: PotionRow) -> tuple:
+    """Sort key that puts rows in brew order: highest value first, then in
+    itertools.combinations order (pairs before triples, then by index).
+    """
+    return (-row.value, len(row.combo), row.combo)
+
+
+class PairResult(NamedTuple):
+    """The shared effects of a pair of ingredients: their mask, the (power, value)
+    products of each one, and the pair's potion value.
+    """
+    mask: int
+    products: dict[int, tuple[float, float]]
+    value: float
+
+
+class BrewTable:
+    """A BrewTable holds the bitmask encoding of a list of ingredients.  Ingredients are
+    referred to by their index in the table, so a combination is just a tuple of ints.
+    """
+
+    def __init__(self, ingredients: list[Ingredient]):
+        self.ingredients = ingredients
+        self.indexes = {ingredient.name: index for index, ingredient in enumerate(ingredients)}
+        # Per ingredient: (bit, name, power, value) for each effect, in listed order
+        self.slots = [
+            tuple((get_effect_bit(effect.name), effect.name, effect.power, effect.value) for effect in ingredient.effects)
+            for ingredient in ingredients
+        ]
+        self.masks = [reduce(lambda mask, slot: mask | (1 << slot[0]), slots, 0) for slots in self.slots]
+        self.powers = [{bit: power for bit, _, power, _ in slots} for slots in self.slots]
+        self.values = [{bit: value for bit, _, _, value in slots} for slots in self.slots]
+
+        # Adjacency: bit j of neighbors[i] is set if ingredients i and j share an effect.
+        # The pair table holds, for each pair that shares effects, the shared mask and the
+        # (power, value) products of each shared effect.  Triples are derived from it.
+        self.neighbors = [0] * len(ingredients)
+        self.pair_table: dict[tuple[int, int], PairResult] = {}
+        # Only pairs that appear together in some effect's posting list can share
+        postings: dict[int, list[int]] = {}
+        for index, slots in enumerate(self.slots):
+            for bit, _, _, _ in slots:
+                postings.setdefault(bit, []).append(index)
+        candidates = sorted({pair for indexes in postings.values() for pair in itertools_combinations(indexes, 2)})
+        for a, b in candidates:
+            shared = self.masks[a] & self.masks[b]
+            self.neighbors[a] |= 1 << b
+            self.neighbors[b] |= 1 << a
+            products = {
+                bit: (self.powers[a][bit] * self.powers[b][bit], self.values[a][bit] * self.values[b][bit])
+                for bit in iter_bits(shared)
+            }
+            value = 0
+            for bit, _ in self.effect_order((a, b), shared):
+                value += products[bit][1]
+            self.pair_table[(a, b)] = PairResult(shared, products, value)
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    def pairs(self):
+        """Yield (combo, mask) for every pair of ingredients that shares an effect, in
+        itertools.combinations order.  Only adjacent ingredients are visited.
+        """
+        for a, neighbors in enumerate(self.neighbors):
+            for b in iter_bits(bits_above(neighbors, a)):
+                yield (a, b), self.pair_table[(a, b)].mask
+
+    def triples(self, a: int, within: int = -1) -> list[tuple[int, int, int]]:
+        """Get the triples (a, b, c) with a < b < c in which every ingredient contributes
+        at least one active effect, sorted.  That's the in-game rule, and it means the
+        three ingredients are connected in the adjacency graph: either a and b share an
+        effect and c shares one with either of them, or both share one with c.  Only
+        ingredients in the `within` mask are used for b and c (all of them by default).
+        """
+        neighbors = self.neighbors
+        above_a = bits_above(neighbors[a] & within, a)
+        triples = []
+        for b in iter_bits(above_a):
+            for c in iter_bits(bits_above((neighbors[a] | neighbors[b]) & within, b)):
+                triples.append((a, b, c))
+        for c in iter_bits(above_a):
+            between = bits_above(neighbors[c] & ~neighbors[a] & within & ((1 << c) - 1), a)
+            for b in iter_bits(between):
+                triples.append((a, b, c))
+        triples.sort()
+        return triples
+
+    def potion_combos(self, track=iterate):
+        """Yield (combo, mask) for every pair and triple that makes a potion, in
+        itertools.combinations order.  Cost scales with the number of potions rather
+        than with n cubed, since only ingredients sharing an effect are ever visited.
+        """
+        yield from self.pairs()
+        for a in track(range(len(self)), total=len(self), description="Brewing potions"):
+            for combo in self.triples(a):
+                yield combo, self.shared_mask(combo)
+
+    def first_rows(self, a: int):
+        """Yield a PotionRow for every potion whose first ingredient is `a`: its pairs,
+        then its triples.  Brewing can be split up (sharded) this way.
+        """
+        for b in iter_bits(bits_above(self.neighbors[a], a)):
+            yield self.row((a, b), self.pair_table[(a, b)].mask)
+        for combo in self.triples(a):
+            yield self.row(combo, self.shared_mask(combo))
+
+    def rows(self, track=iterate):
+        """Yield a PotionRow for every potion, in itertools.combinations order."""
+        for combo, mask in self.potion_combos(track=track):
+            yield self.row(combo, mask)
+
+    def row(self, combo: tuple[int, ...], mask: int) -> PotionRow:
+        """Get the PotionRow for a combination that makes a potion."""
+        return PotionRow(combo, mask, self.value(combo, mask), self.cost(combo))
+
+    def shared_mask(self, combo: tuple[int, ...]) -> int:
+        """Get the mask of effects shared by at least two ingredients in the combination."""
+        masks = self.masks
+        if len(combo) == 2:
+            return masks[combo[0]] & masks[combo[1]]
+        a, b, c = masks[combo[0]], masks[combo[1]], masks[combo[2]]
+        return (a & b) | (a & c) | (b & c)
+
+    def effect_order(self, combo: tuple[int, ...], mask: int) -> list[tuple[int, str]]:
+        """Get the (bit, name) of each active effect, in the order Ingredient.combine
+        would produce them (first appearance across the ingredients' effect lists).
+        """
+        order = []
+        remaining = mask
+        for index in combo:
+            for bit, name, _, _ in self.slots[index]:
+                if remaining >> bit & 1:
+                    order.append((bit, name))
+                    remaining ^= 1 << bit
+            if not remaining:
+                break
+        return order
+
+    def products(self, combo: tuple[int, ...], bit: int) -> tuple[float, float]:
+        """Get the (power, value) products of an active effect, looked up in the pair
+        table.  For a triple, the effect is shared by one of its three pairs, or by all
+        three ingredients, in which case the first pair's product is extended by the
+        third ingredient's multipliers.
+        """
+        if len(combo) == 2:
+            return self.pair_table[combo].products[bit]
+        a, b, c = combo
+        masks = self.masks
+        if masks[a] >> bit & 1 and masks[b] >> bit & 1:
+            power, value = self.pair_table[(a, b)].products[bit]
+            if masks[c] >> bit & 1:
+                return power * self.powers[c][bit], value * self.values[c][bit]
+            return power, value
+        return self.pair_table[(a, c) if masks[a] >> bit & 1 else (b, c)].products[bit]
+
+    def value(self, combo: tuple[int, ...], mask: int) -> float:
+        """Get the value of the potion brewed from the combination, without building any
+        ActiveEffect objects.  Matches Effect.get_value(Ingredient.combine(...)) exactly.
+        """
+        if len(combo) == 2:
+            pair = self.pair_table.get(combo)
+            return pair.value if pair else 0
+        total = 0
+        for bit, _ in self.effect_order(combo, mask):
+            total += self.products(combo, bit)[1]
+        return total
+
+    def cost(self, combo: tuple[int, ...]) -> float:
+        """Get the total cost of the ingredients in the combination."""
+        return sum(self.ingredients[index].value for index in combo)
+
+    def active_effects(self, combo: tuple[int, ...], mask: int) -> list[ActiveEffect]:
+        """Build the ActiveEffects for the combination's shared effects."""
+        active_effects = []
+        for bit, name in self.effect_order(combo, mask):
+            power, value = self.products(combo, bit)
+            active_effects.append(ActiveEffect(name=name, power=power, value=value))
+        return active_effects
@@ -0,0 +1,204 @@
+"""
+The potion catalog is every potion that can be brewed from the full ingredient list,
+brewed once and saved as a compact columnar binary file.  The app memory-maps the
+file at startup, so workers start instantly and share the same pages instead of each
+re-brewing.
+
+The catalog is keyed by a hash of the data files, and it's ignored if they've changed
+since it was built.  Build (or rebuild) it with:
+
+    invoke build-catalog
+
+File layout:
+    magic        8 bytes, b'ALCHCAT2'
+    length       uint32, size of the JSON header in bytes
+    header       JSON: data hash, ingredient names, effect names (in bit order), rows
+    padding      zero bytes up to an 8 byte boundary
+    ingredients  int16[rows, 3], indices into the ingredient names (-1 pads pairs)
+    effects      uint64[rows, words], active effect mask with 64 effects per word
+    members      uint64[rows, words], mask of the ingredients used, 64 per word
+    values       float64[rows]
+    costs        float64[rows]
+
+Rows are sorted by value from highest to lowest, in the same order Potion.brew uses.
+
+Because every row carries a mask of its ingredients, "which potions can I make from
+these ingredients" is a subset test over the whole catalog (members & ~selected == 0)
+rather than a fresh brew, and it takes the same time however many are selected.
+
+Usage:
+    from catalog import Catalog
+    catalog = Catalog.open()
+    if catalog is not None:
+        best = catalog.potions()[:10]
+        mine = catalog.select(["Wheat", "Blue Mountain Flower", "Giant's Toe"])
+"""
+
+import hashlib
+import json
+import numpy as np
+
+from brewing import BrewTable, EffectBits
+from ingredient import AllIngredientsByName, Ingredient, get_ingredient_by_name
+from potion import Potion, PotionList, iterate
+from vectorized import ArrayRows, VectorTable
+
+CATALOG_FILE = 'potions.catalog'
+DATA_FILES = ('ingredients.yaml', 'effects.yaml')
+MAGIC = b'ALCHCAT2'
+
+
+def to_words(mask: int, words: int) -> list[int]:
+    """Split an int bitmask into 64 bit words, lowest first."""
+    return [(mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(words)]
+
+
+def get_data_hash(filenames=DATA_FILES) -> str:
+    """Hash the contents of the data files the catalog was brewed from."""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class Catalog:
+    """A Catalog holds the columns of every brewable potion, sorted by value."""
+
+    def __init__(self, data_hash: str, ingredient_names: list[str], effect_names: list[str],
+                 ingredients: np.ndarray, effects: np.ndarray, members: np.ndarray, values: np.ndarray,
+                 costs: np.ndarray):
+        self.data_hash = data_hash
+        self.ingredient_names = ingredient_names
+        self.ingredient_indexes = {name: index for index, name in enumerate(ingredient_names)}
+        self.effect_names = effect_names
+        self.ingredients = ingredients
+        self.effects = effects
+        self.members = members
+        self.values = values
+        self.costs = costs
+        self._table = None
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def table(self) -> BrewTable:
+        """The BrewTable for the catalog's ingredients, used to build Potions from rows."""
+        if self._table is None:
+            self._table = BrewTable([get_ingredient_by_name(name) for name in self.ingredient_names])
+        return self._table
+
+    def effect_mask(self, row: int) -> int:
+        """Get the active effect mask of a row as an int, in the catalog's effect order."""
+        return sum(int(word) << (64 * index) for index, word in enumerate(self.effects[row]))
+
+    def potions(self) -> PotionList:
+        """Get every potion in the catalog, highest value first, as a lazy PotionList."""
+        return PotionList(self.table, ArrayRows(self.table, self.ingredients, self.values, self.costs))
+
+    def covers(self, ingredients: list[Ingredient | str]) -> bool:
+        """Check that select can answer for a list of ingredients: every valid ingredient
+        in it must be one of the loaded ingredients the catalog was brewed from.
+        """
+        for item in ingredients:
+            ingredient = AllIngredientsByName.get(item) if isinstance(item, str) else item
+            if ingredient is None:
+                return False
+            if not Potion.is_valid_ingredient(ingredient):
+                continue
+            if ingredient.name not in self.ingredient_indexes or ingredient is not AllIngredientsByName[ingredient.name]:
+                return False
+        return True
+
+    def select(self, ingredients: list[Ingredient | str]) -> PotionList:
+        """Get the potions that can be made from a selection of ingredients, highest
+        value first, as a lazy PotionList.  Ingredients the catalog doesn't know (like
+        Jarrin Root) are ignored; use covers to check first.
+        """
+        selected = 0
+        for item in ingredients:
+            index = self.ingredient_indexes.get(item if isinstance(item, str) else item.name)
+            if index is not None:
+                selected |= 1 << index
+        outside = np.array([~word & 0xFFFFFFFFFFFFFFFF for word in to_words(selected, self.members.shape[1])],
+                           dtype=np.uint64)
+        rows = np.flatnonzero(~(self.members & outside).any(axis=1))
+        return PotionList(self.table, ArrayRows(self.table, self.ingredients[rows], self.values[rows], self.costs[rows]))
+
+    @staticmethod
+    def build(track=iterate) -> 'Catalog':
+        """Brew every potion from the full ingredient list."""
+        ingredients = Potion.resolve_ingredients(list(AllIngredientsByName.values()))
+        table = VectorTable(ingredients)
+        combos, values = table.brew(track=track)
+        return Catalog(
+            data_hash=get_data_hash(),
+            ingredient_names=[ingredient.name for ingredient in ingredients],
+            effect_names=list(EffectBits),
+            ingredients=combos.astype(np.int16),
+            effects=table.effect_words(combos),
+            members=table.member_words(combos),
+            values=values,
+            costs=table.costs_of(combos),
+        )
+
+    def save(self, filename: str = CATALOG_FILE):
+        """Write the catalog to a file."""
+        header = json.dumps({
+            'data_hash': self.data_hash,
+            'ingredients': self.ingredient_names,
+            'effects': self.effect_names,
+            'rows': len(self),
+            'words': self.effects.shape[1],
+            'member_words': self.members.shape[1],
+        }).encode('utf-8')
+        with open(filename, 'wb') as file:
+            file.write(MAGIC)
+            file.write(np.uint32(len(header)).tobytes())
+            file.write(header)
+            file.write(b'\0' * (-file.tell() % 8))
+            for column in (self.ingredients, self.effects, self.members, self.values, self.costs):
+                file.write(np.ascontiguousarray(column).astype(column.dtype.newbyteorder('<')).tobytes())
+
+    @staticmethod
+    def load(filename: str = CATALOG_FILE) -> 'Catalog':
+        """Memory-map a catalog file.  Raises ValueError if it isn't a catalog."""
+        with open(filename, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a potion catalog: {filename}")
+            length = int(np.frombuffer(file.read(4), dtype='<u4')[0])
+            header = json.loads(file.read(length))
+        offset = len(MAGIC) + 4 + length
+        offset += -offset % 8
+        rows, words, member_words = header['rows'], header['words'], header['member_words']
+        columns = []
+        layout = (('<i2', (rows, 3)), ('<u8', (rows, words)), ('<u8', (rows, member_words)),
+                  ('<f8', (rows,)), ('<f8', (rows,)))
+        for dtype, shape in layout:
+            if rows:
+                columns.append(np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape))
+            else:
+                columns.append(np.zeros(shape, dtype=dtype))
+            offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return Catalog(header['data_hash'], header['ingredients'], header['effects'], *columns)
+
+    @staticmethod
+    def open(filename: str = CATALOG_FILE) -> 'Catalog | None':
+        """Memory-map the catalog if it exists and matches the current data files,
+        otherwise return None (callers should fall back to brewing).
+        """
+        try:
+            catalog = Catalog.load(filename)
+        except (OSError, ValueError):
+            return None
+        if catalog.data_hash != get_data_hash():
+            return None
+        return catalog
+
+
+if __name__ == '__main__':
+    from rich.progress import track
+    catalog = Catalog.build(track=track)
+    catalog.save()
+    print(f"Wrote {len(catalog)} potions to {CATALOG_FILE}")
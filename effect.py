@@ -8,8 +8,11 @@ calculates the total value of a list of effects.
 
 This module requires a master list of effects to be loaded from a file.  The
 file can be in either JSON or YAML format.  The list of effects is stored in
-a dictionary called AllEffectsByName, which maps effect names to Effect objects.
-You can use the get_effect_by_name function to look up an effect by name.
+a registry called AllEffectsByName, which maps effect names to Effect objects.
+It's loaded the first time it's read, not at import (see registry.py), and other
+datasets can be added to EffectRegistries.  You can use the get_effect_by_name
+function to look up an effect by name.  YAML files are loaded from their
+compiled snapshot when it's up to date (see snapshot.py).
 
 YAML format for effects:
 - name: "Name"
@@ -42,6 +45,16 @@ from pydantic import BaseModel
 import json
 import yaml
 
+from listing import Listing
+from registry import Registries, Registry, RegistryView
+from snapshot import load_snapshot
+
+
+# Tunable properties to see if we can get the right values (also used by pricing.py)
+MAG_POW = 1.1
+DUR_POW = 1.1
+DUR_FACTOR = 0.0794328
+
 
 class Effect(BaseModel):
     name: str
@@ -55,15 +68,11 @@ class Effect(BaseModel):
 
     @property
     def value(self) -> float:
-        # Tunable properties to see if we can get the right values
-        mag_pow = 1.1
-        dur_pow = 1.1
-        dur_factor = 0.0794328
         result = self.cost
         if self.mag > 0:
-            result *= self.mag ** mag_pow
+            result *= self.mag ** MAG_POW
         if self.dur > 0:
-            result *= self.dur ** dur_pow * dur_factor
+            result *= self.dur ** DUR_POW * DUR_FACTOR
         return math.floor(result)
 
     @property
@@ -75,20 +84,45 @@ class Effect(BaseModel):
         return sum(effect.value for effect in effects)
 
     @staticmethod
-    def from_file(filename: str = 'effects.yaml') -> list['Effect']:
+    def from_file(filename: str = 'effects.yaml', use_snapshot: bool = True) -> list['Effect']:
         if filename.endswith('.json'):
             with open(filename, 'r') as file:
                 return [Effect(**effect) for effect in json.load(file)]
         elif filename.endswith('.yaml'):
+            # Prefer the compiled snapshot (see snapshot.py) if it's up to date
+            effects = load_snapshot(filename, Effect) if use_snapshot else None
+            if effects is not None:
+                return effects
             with open(filename, 'r') as file:
                 return [Effect(**effect) for effect in yaml.safe_load(file)]
         else:
             raise ValueError('Unsupported file format')
 
-AllEffectsByName = {
-    effect.name: effect
-    for effect in Effect.from_file()
+# Effects by dataset name.  The default dataset is loaded from effects.yaml the first
+# time AllEffectsByName is read (see registry.py).
+EffectRegistries: Registries[Effect] = Registries(Effect.from_file, 'effects.yaml')
+AllEffectsByName: Registry[Effect] = EffectRegistries.default
+
+# The sort orders and filters of the effect listing (type and school match any case)
+EffectSortKeys = {
+    'name': lambda effect: effect.name,
+    'description': lambda effect: effect.description,
+    'school': lambda effect: effect.school,
+    'type': lambda effect: effect.type,
+    'cost': lambda effect: effect.cost,
+}
+EffectFacets = {
+    'type': lambda effect: effect.type.lower(),
+    'school': lambda effect: effect.school.lower(),
+}
+# Searched fields, with their weights in the ranking ({mag} and {dur} aren't searched)
+EffectSearchFields = {
+    'name': (lambda effect: effect.name, 3.0),
+    'description': (lambda effect: effect.description, 1.0),
 }
+EffectListing: RegistryView[Listing[Effect]] = RegistryView(
+    AllEffectsByName,
+    lambda effects: Listing(effects, EffectSortKeys, EffectFacets, EffectSearchFields, name=lambda effect: effect.name))
 
 def get_effect_by_name(name: str) -> Effect:
     return AllEffectsByName[name]
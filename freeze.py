@@ -0,0 +1,243 @@
+"""
+Freeze the deterministic pages into a static site.  The ingredient and effect pages,
+the unfiltered listings and the "farmable", "best" and "all" potion pages only depend
+on the data files and the templates, so they can be rendered once, written to disk
+with gzip variants, and served straight from files (by the app, or by any static
+file server without Flask).
+
+Pages are rendered through the app's test client, across a process pool.  The
+manifest records a fingerprint of each page's inputs (its ingredient or effect, or
+all the data for the listings, plus the templates and code), so freezing again
+only renders the pages whose inputs changed.
+
+File layout (under FROZEN_DIR):
+    skyrim/ingredients/Wheat/index.html                     /skyrim/ingredients/Wheat
+    skyrim/potions/ingredients=all&limit=100.html           /skyrim/potions?ingredients=all&limit=100
+    ... .html.gz                                            gzip variant of each page
+    manifest.json                                           data hash, page fingerprints
+
+A static server needs to map a query string to its file, e.g. with nginx:
+
+    try_files $uri/index.html $uri/$args.html @flask;
+
+Freeze (or refreeze) the site with:
+
+    invoke freeze
+
+Usage:
+    from freeze import FrozenSite
+    site = FrozenSite.open()     # None if missing or built from other data
+    response = site.serve()      # in a request: the frozen page, or None
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlencode
+
+from flask import Response, request, send_file, url_for
+
+from catalog import get_data_hash
+from effect import AllEffectsByName
+from ingredient import AllIngredientsByName, get_ingredients_with_effect
+
+FROZEN_DIR = 'frozen_site'
+MANIFEST_FILE = 'manifest.json'
+# The code that renders the pages (every module but the tests, since the routes reach
+# most of them); a change to any of it refreezes everything
+CODE_GLOB = '*.py'
+TEST_GLOB = 'test_*.py'
+TEMPLATES_DIR = 'templates'
+# How long browsers and proxies may use a frozen page before revalidating it
+MAX_AGE = 300
+POTION_PAGES = ('farmable', 'best', 'all')
+POTION_PAGE_LIMIT = 100
+
+
+def get_page_url(path: str, args: dict = None) -> str:
+    """Normalize a page's path and query string (parameters sorted) into its URL."""
+    return f"{path}?{urlencode(sorted(args.items()))}" if args else path
+
+
+def get_page_filename(url: str) -> str:
+    """Get the file a page is frozen to, relative to the frozen site directory."""
+    path, _, query = url.partition('?')
+    path = path.strip('/')
+    if query:
+        return f"{path}/{query}.html" if path else f"{query}.html"
+    return f"{path}/index.html" if path else 'index.html'
+
+
+def get_code_files() -> list[str]:
+    """Get the modules and templates that the pages are rendered by."""
+    tests = set(Path().glob(TEST_GLOB))
+    modules = [str(path) for path in Path().glob(CODE_GLOB) if path not in tests]
+    return sorted(modules) + sorted(str(path) for path in Path(TEMPLATES_DIR).rglob('*.html'))
+
+
+def get_code_hash() -> str:
+    """Hash the templates and code that the pages are rendered by."""
+    digest = hashlib.sha256()
+    for filename in get_code_files():
+        digest.update(filename.encode())
+        digest.update(Path(filename).read_bytes())
+    return digest.hexdigest()
+
+
+def get_fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()[:32]
+
+
+def get_pages() -> dict[str, str]:
+    """Get every page to freeze, by URL, with the fingerprint of its inputs."""
+    from app import app
+    code_hash = get_code_hash()
+    data_hash = get_data_hash()
+    inputs: dict[str, list[str]] = {}
+    with app.test_request_context():
+        for endpoint in ('home', 'skyrim', 'skyrim_ingredients', 'skyrim_effects'):
+            inputs[url_for(endpoint)] = [data_hash]
+        for selection in POTION_PAGES:
+            inputs[get_page_url('/skyrim/potions', {'ingredients': selection, 'limit': POTION_PAGE_LIMIT})] = [data_hash]
+        # Detail pages only depend on their own record (and an effect's ingredients)
+        for ingredient in AllIngredientsByName.values():
+            inputs[url_for('skyrim_ingredient', name=ingredient.name)] = [ingredient.model_dump_json()]
+        for effect in AllEffectsByName.values():
+            inputs[url_for('skyrim_effect', name=effect.name)] = [effect.model_dump_json()] + [
+                ingredient.model_dump_json() for ingredient in get_ingredients_with_effect(effect)
+            ]
+    # Every fingerprint has the code hash, so a code change refreezes the detail pages
+    # too, and the URL, so pages with the same inputs get distinct ETags
+    return {unquote(url): get_fingerprint(url, code_hash, *parts) for url, parts in inputs.items()}
+
+
+def write_file(filename: Path, data: bytes):
+    """Write a file atomically, so a server never sees a partial page."""
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    temp = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+    temp.write_bytes(data)
+    os.replace(temp, filename)
+
+
+def render_pages(urls: list[str], directory: str = FROZEN_DIR) -> list[str]:
+    """Render pages and write them (and their gzip variants) to the frozen site.
+    Returns the URLs that rendered (pages that don't return 200 are skipped).
+    """
+    import app as app_module
+    # Render the pages themselves, not an older frozen copy of them
+    app_module.frozen_site = None
+    client = app_module.app.test_client()
+    rendered = []
+    for url in urls:
+        response = client.get(url)
+        if response.status_code != 200:
+            continue
+        body = response.get_data()
+        filename = Path(directory) / get_page_filename(url)
+        write_file(filename, body)
+        write_file(filename.with_name(filename.name + '.gz'), gzip.compress(body, compresslevel=9, mtime=0))
+        rendered.append(url)
+    return rendered
+
+
+def load_manifest(directory: str = FROZEN_DIR) -> dict:
+    try:
+        with open(Path(directory) / MANIFEST_FILE) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def freeze(directory: str = FROZEN_DIR, workers: int = None, force: bool = False) -> tuple[int, int]:
+    """Freeze every page whose inputs changed since the last freeze (or every page,
+    with force), across `workers` processes (default: one per CPU).  Pages that no
+    longer exist are deleted.  Returns (pages rendered, pages unchanged).
+    """
+    pages = get_pages()
+    previous = {} if force else load_manifest(directory).get('pages', {})
+    stale = [
+        url for url, fingerprint in pages.items()
+        if previous.get(url) != fingerprint or not (Path(directory) / get_page_filename(url)).exists()
+    ]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(stale)))
+    rendered: list[str] = []
+    if workers == 1:
+        rendered = render_pages(stale, directory)
+    else:
+        shards = [stale[start::workers] for start in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for urls in executor.map(render_pages, shards, [directory] * len(shards)):
+                rendered.extend(urls)
+    for url in set(previous) - set(pages):
+        for suffix in ('', '.gz'):
+            (Path(directory) / (get_page_filename(url) + suffix)).unlink(missing_ok=True)
+    done = set(rendered) | (set(pages) - set(stale))
+    frozen = {url: fingerprint for url, fingerprint in pages.items() if url in done}
+    manifest = {'data_hash': get_data_hash(), 'code_hash': get_code_hash(), 'pages': frozen}
+    write_file(Path(directory) / MANIFEST_FILE, json.dumps(manifest, indent=1).encode())
+    return len(rendered), len(pages) - len(stale)
+
+
+class FrozenSite:
+    """A frozen site on disk, served in place of the pages it holds."""
+
+    def __init__(self, directory: str, pages: dict[str, str]):
+        self.directory = Path(directory).resolve()
+        self.pages = pages
+
+    @staticmethod
+    def open(directory: str = FROZEN_DIR) -> 'FrozenSite | None':
+        """Open the frozen site if it exists and was frozen from the current data and
+        code, otherwise return None (callers should fall back to rendering).
+        """
+        manifest = load_manifest(directory)
+        if not manifest or manifest.get('data_hash') != get_data_hash() or \
+                manifest.get('code_hash') != get_code_hash():
+            return None
+        return FrozenSite(directory, manifest['pages'])
+
+    def serve(self) -> Response | None:
+        """Serve the current request from the frozen site, or return None if it isn't a
+        frozen page.  The gzip variant is served to clients that accept it, and the
+        page's fingerprint is its ETag.
+        """
+        if request.method != 'GET':
+            return None
+        args = request.args.to_dict(flat=False)
+        if any(len(values) > 1 for values in args.values()):
+            return None
+        url = get_page_url(request.path, {name: values[0] for name, values in args.items()})
+        fingerprint = self.pages.get(url)
+        if fingerprint is None:
+            return None
+        filename = self.directory / get_page_filename(url)
+        gzipped = 'gzip' in request.accept_encodings
+        response = send_file(
+            f"{filename}.gz" if gzipped else filename, mimetype='text/html',
+            etag=f"{fingerprint}-gzip" if gzipped else fingerprint, conditional=True, max_age=MAX_AGE,
+        )
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Cache-Control'] = f"public, max-age={MAX_AGE}"
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Freeze the deterministic pages into a static site")
+    parser.add_argument('--output', default=FROZEN_DIR, help="directory to freeze the site into")
+    parser.add_argument('--workers', type=int, help="processes to render with (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="render every page, even unchanged ones")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    rendered, unchanged = freeze(args.output, workers=args.workers, force=args.force)
+    print(f"Froze {rendered} pages ({unchanged} unchanged) into {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,163 @@
+"""
+An HTTP caching layer for pages that only depend on the data files and the query
+string (the ingredient and effect lists and pages, and most potion pages).  Rendering
+one re-filters, re-sorts and re-renders Jinja on every hit, so the finished response
+is cached, keyed on the route, the normalized query string and the data version
+(the registries' versions, which change whenever the data is reloaded).
+
+A cached response carries a strong ETag (a hash of its body) and Cache-Control, so
+browsers and proxies can revalidate with If-None-Match and get a 304 instead of the
+page.  Text bodies are gzip-compressed once, when they're cached, and the compressed
+copy is served to clients that accept gzip.
+
+Usage:
+    from http_cache import ResponseCache
+    response_cache = ResponseCache(version=lambda: (AllEffectsByName.version, AllIngredientsByName.version))
+
+    @app.route("/skyrim/effects")
+    @response_cache.cached()
+    def skyrim_effects():
+        ...
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Callable, Hashable, NamedTuple
+
+from flask import Response, make_response, request
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript')
+# How long browsers and proxies may use a response before revalidating it
+MAX_AGE = 300
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    gzipped: bytes | None
+    etag: str
+    content_type: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b'')
+
+
+class ResponseCache:
+    """An LRU cache of rendered responses, bounded by entries and by bytes."""
+
+    def __init__(self, version: Callable[[], Hashable] = lambda: None, max_entries: int = 1024,
+                 max_bytes: int = 32 * 1024 * 1024, max_age: int = MAX_AGE):
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self) -> tuple:
+        """The cache key for the current request: route, normalized query string (sorted,
+        so parameter order doesn't matter) and data version.
+        """
+        return request.path, tuple(sorted(request.args.items(multi=True))), self.version()
+
+    @staticmethod
+    def compress(response: Response, body: bytes) -> bytes | None:
+        """Gzip a text body, or None if it's too small or not text.  The timestamp is
+        fixed so the same body always compresses to the same bytes.
+        """
+        if len(body) < MIN_COMPRESS_BYTES or not response.mimetype.startswith(COMPRESSIBLE_TYPES):
+            return None
+        return gzip.compress(body, compresslevel=9, mtime=0)
+
+    def store(self, key: tuple, response: Response) -> CachedResponse:
+        body = response.get_data()
+        entry = CachedResponse(
+            body=body,
+            gzipped=self.compress(response, body),
+            etag=hashlib.sha256(body).hexdigest()[:32],
+            content_type=response.headers['Content-Type'],
+        )
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            if entry.size <= self.max_bytes:
+                self.entries[key] = entry
+                self.size += entry.size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+        return entry
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def respond(self, entry: CachedResponse) -> Response:
+        """Build the response for a cached entry: 304 if the client already has it,
+        otherwise the gzipped body if the client accepts it, or the plain body.  Each
+        encoding gets its own ETag, since they're different bytes.
+        """
+        gzipped = entry.gzipped is not None and 'gzip' in request.accept_encodings
+        etag = f"{entry.etag}-gzip" if gzipped else entry.etag
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(entry.gzipped if gzipped else entry.body, content_type=entry.content_type)
+            if gzipped:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f"public, max-age={self.max_age}"
+        if entry.gzipped is not None:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def cached(self, when: Callable[[], bool] = None):
+        """Decorate a view to cache its GET responses.  `when`, if given, is checked for
+        each request, and requests it rejects (say, a random selection) aren't cached.
+        Only 200 responses are cached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or (when is not None and not when()):
+                    return view(*args, **kwargs)
+                entry = self.get(self.key())
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    # Keyed after rendering, so a first render that loads the data
+                    # is stored under the version it was rendered from
+                    entry = self.store(self.key(), response)
+                return self.respond(entry)
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """Drop every entry, e.g. after the data is reloaded."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Get the cache counters."""
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
@@ -6,9 +6,10 @@ are not.  Ingredients are combined in potion making to produce ActiveEffects.
 
 This module requires a master list of ingredients to be loaded from a file.  The
 file can be in either JSON or YAML format.  The list of ingredients is stored in
-a dictionary called AllIngredientsByName, which maps ingredient names to Ingredient
-objects.  You can use the get_ingredient_by_name function to look up an ingredient
-by name.
+a registry called AllIngredientsByName, which maps ingredient names to Ingredient
+objects.  It's loaded the first time it's read, not at import (see registry.py),
+and other datasets can be added to IngredientRegistries.  You can use the
+get_ingredient_by_name function to look up an ingredient by name.
 
 YAML format for ingredients:
 - name: "Name"
@@ -50,6 +51,9 @@ import json
 import yaml
 
 from effect import Effect
+from listing import Listing
+from registry import Registries, Registry, RegistryIndex, RegistryView
+from snapshot import load_snapshot
 
 def group_by(iterable, get_key):
     groups = defaultdict(list)
@@ -142,12 +146,18 @@ class Ingredient(BaseModel):
         return activeEffects
 
     @staticmethod
-    def from_file(filename: str = 'ingredients.yaml') -> list['Ingredient']:
-        """Load a list of ingredients from a file.  The file can be in either JSON or YAML"""
+    def from_file(filename: str = 'ingredients.yaml', use_snapshot: bool = True) -> list['Ingredient']:
+        """Load a list of ingredients from a file.  The file can be in either JSON or YAML.
+        A YAML file is loaded from its compiled snapshot (see snapshot.py) when that's up
+        to date, unless use_snapshot is False.
+        """
         if filename.endswith('.json'):
             with open(filename, 'r') as file:
                 return [Ingredient(**ingredient) for ingredient in json.load(file)]
         elif filename.endswith('.yaml'):
+            ingredients = load_snapshot(filename, Ingredient) if use_snapshot else None
+            if ingredients is not None:
+                return ingredients
             with open(filename, 'r') as file:
                 return [Ingredient(**ingredient) for ingredient in yaml.safe_load(file)]
         else:
@@ -165,10 +175,64 @@ class Ingredient(BaseModel):
         """
         return template.format(name=self.name, farmable=str(self.farmable).lower())
 
-AllIngredientsByName = {
-    ingredient.name: ingredient
-    for ingredient in Ingredient.from_file()
+# Ingredients by dataset name.  The default dataset is loaded from ingredients.yaml
+# the first time AllIngredientsByName (or one of its indexes) is read.
+IngredientRegistries: Registries[Ingredient] = Registries(Ingredient.from_file, 'ingredients.yaml')
+AllIngredientsByName: Registry[Ingredient] = IngredientRegistries.default
+
+def index_by_effect(ingredients: list[Ingredient]) -> dict[str, list[Ingredient]]:
+    index = {}
+    for ingredient in ingredients:
+        for effect in ingredient.effects:
+            index.setdefault(effect.name, []).append(ingredient)
+    return index
+
+def index_by_category(ingredients: list[Ingredient]) -> dict[str, list[Ingredient]]:
+    index = {}
+    for ingredient in ingredients:
+        if ingredient.category is not None:
+            index.setdefault(ingredient.category, []).append(ingredient)
+    return index
+
+def index_by_farmable(ingredients: list[Ingredient]) -> dict[bool, list[Ingredient]]:
+    index = {True: [], False: []}
+    for ingredient in ingredients:
+        index[ingredient.farmable].append(ingredient)
+    return index
+
+# Inverted indexes over AllIngredientsByName.  Each list is in AllIngredientsByName
+# order, and they're rebuilt whenever the ingredients are (re)loaded.
+IngredientsByEffect: RegistryIndex[list[Ingredient]] = RegistryIndex(AllIngredientsByName, index_by_effect)
+IngredientsByCategory: RegistryIndex[list[Ingredient]] = RegistryIndex(AllIngredientsByName, index_by_category)
+IngredientsByFarmable: RegistryIndex[list[Ingredient]] = RegistryIndex(AllIngredientsByName, index_by_farmable)
+
+# The sort orders and filters of the ingredient listing
+IngredientSortKeys = {
+    'name': lambda ingredient: ingredient.name,
+    'category': lambda ingredient: ingredient.category or "",
+    'value': lambda ingredient: ingredient.value,
+    'weight': lambda ingredient: ingredient.weight,
+}
+IngredientFacets = {
+    'farmable': lambda ingredient: ingredient.farmable,
+    'category': lambda ingredient: ingredient.category,
 }
+# Searched fields, with their weights in the ranking
+IngredientSearchFields = {
+    'name': (lambda ingredient: ingredient.name, 3.0),
+    'category': (lambda ingredient: ingredient.category, 1.0),
+}
+IngredientListing: RegistryView[Listing[Ingredient]] = RegistryView(
+    AllIngredientsByName,
+    lambda ingredients: Listing(ingredients, IngredientSortKeys, IngredientFacets, IngredientSearchFields,
+                                name=lambda ingredient: ingredient.name))
+
+def load_ingredients(filename: str = None):
+    """(Re)load the master list of ingredients now, from `filename` or by default from
+    ingredients.yaml.  Modules that imported AllIngredientsByName or the indexes see
+    the new data.
+    """
+    AllIngredientsByName.load(filename)
 
 def get_ingredient_by_name(name: str) -> Ingredient:
     try:
@@ -181,11 +245,7 @@ def get_ingredients_by_filter(predicate):
 
 def get_all_categories():
     """Get a set of all unique categories present in the loaded ingredients."""
-    return {
-        ingredient.category 
-        for ingredient in AllIngredientsByName.values() 
-        if ingredient.category is not None
-    }
+    return set(IngredientsByCategory)
 
 def get_ingredients_by_category(category: str, exact_match: bool = False):
     """Get all ingredients with the specified category.
@@ -196,9 +256,17 @@ def get_ingredients_by_category(category: str, exact_match: bool = False):
                     If False, matches any ingredient whose category starts with the given string.
     """
     if exact_match:
-        return get_ingredients_by_filter(lambda i: i.category == category)
-    else:
-        return get_ingredients_by_filter(lambda i: i.category and i.category.startswith(category))
+        return list(IngredientsByCategory.get(category, []))
+    matches = {
+        ingredient.name
+        for name, ingredients in IngredientsByCategory.items() if name and name.startswith(category)
+        for ingredient in ingredients
+    }
+    return [ingredient for name, ingredient in AllIngredientsByName.items() if name in matches]
+
+def get_farmable_ingredients(farmable: bool = True) -> list[Ingredient]:
+    """Get all ingredients that are (or, with farmable=False, aren't) farmable."""
+    return list(IngredientsByFarmable.get(farmable, []))
 
 def get_best_ingredients():
     names = [
@@ -216,4 +284,4 @@ def get_best_ingredients():
 def get_ingredients_with_effect(effect: Effect | str) -> list[Ingredient]:
     """Get all ingredients that have the specified effect."""
     effect_name = effect.name if isinstance(effect, Effect) else effect
-    return get_ingredients_by_filter(lambda ingredient: ingredient.has_effect(effect_name))
+    return list(IngredientsByEffect.get(effect_name, []))
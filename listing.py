@@ -0,0 +1,107 @@
+"""
+Precomputed indexes for the listing pages.  A listing request filters the records by
+a few fields (farmable, category, school, type), optionally searches them, and sorts
+them by one of a fixed set of keys.  Rather than build predicates and sort on every
+request, a Listing sorts the records once per sort key and keeps a posting list per
+field value, as a bitmask of record positions.  A request ANDs the masks for its
+filters and walks the presorted order, keeping the records whose bits are set.
+
+Each order is stored as runs of records with equal keys (in record order), so the
+descending order is the runs walked in reverse, with each run still in record order.
+That's exactly what a stable sort with reverse=True gives, without sorting again.
+
+A listing can also have a search index over some of its text fields and a prefix
+index over its names for autocomplete (see search.py).  Search results are a mask
+like any other filter, with scores for ranking.
+
+Listings are built from a registry's records through a RegistryView, so they're
+rebuilt whenever the data is reloaded.
+
+Usage:
+    from listing import Listing
+    listing = Listing(ingredients, sort_keys={'name': attrgetter('name')}, facets={'farmable': attrgetter('farmable')})
+    mask = listing.match('farmable', True)
+    names = [ingredient.name for ingredient in listing.select(mask, 'name', reverse=True)]
+"""
+
+from itertools import groupby
+from typing import Callable, Generic, Hashable, TypeVar
+
+from search import PrefixIndex, SearchIndex
+
+T = TypeVar('T')
+
+
+class Listing(Generic[T]):
+    """Records presorted by each sort key, with posting lists for each facet (a field
+    the listing can be filtered on).
+    """
+
+    def __init__(self, records: list[T], sort_keys: dict[str, Callable[[T], object]],
+                 facets: dict[str, Callable[[T], Hashable]],
+                 search_fields: dict[str, tuple[Callable[[T], str], float]] = None,
+                 name: Callable[[T], str] = None):
+        self.records = list(records)
+        self.all = (1 << len(self.records)) - 1
+        # Per sort key: runs of record positions with equal keys, ascending
+        self.runs: dict[str, list[list[int]]] = {}
+        for sortby, key in sort_keys.items():
+            order = sorted(range(len(self.records)), key=lambda position: key(self.records[position]))
+            self.runs[sortby] = [list(run) for _, run in groupby(order, key=lambda position: key(self.records[position]))]
+        # Per facet: record positions by value, as bitmasks
+        self.postings: dict[str, dict[Hashable, int]] = {}
+        for field, facet in facets.items():
+            postings = self.postings[field] = {}
+            for position, record in enumerate(self.records):
+                value = facet(record)
+                postings[value] = postings.get(value, 0) | 1 << position
+        self.search_index = SearchIndex(self.records, search_fields) if search_fields else None
+        self.prefix_index = PrefixIndex([name(record) for record in self.records]) if name else None
+
+    def __len__(self):
+        return len(self.records)
+
+    def match(self, facet: str, value: Hashable) -> int:
+        """Get the mask of records whose facet has the value."""
+        return self.postings[facet].get(value, 0)
+
+    def match_any(self, facet: str, predicate: Callable[[Hashable], bool]) -> int:
+        """Get the mask of records whose facet value satisfies the predicate.  Only the
+        distinct values are tested, not every record.
+        """
+        mask = 0
+        for value, postings in self.postings[facet].items():
+            if predicate(value):
+                mask |= postings
+        return mask
+
+    def select(self, mask: int = None, sortby: str = None, reverse: bool = False,
+               predicate: Callable[[T], bool] = None) -> list[T]:
+        """Get the records in `mask` (every record if None) that satisfy `predicate`,
+        sorted by `sortby` (ascending, or descending if reverse).
+        """
+        mask = self.all if mask is None else mask
+        runs = self.runs[sortby]
+        selected = []
+        for run in (reversed(runs) if reverse else runs):
+            for position in run:
+                if mask >> position & 1:
+                    record = self.records[position]
+                    if predicate is None or predicate(record):
+                        selected.append(record)
+        return selected
+
+    def search(self, query: str) -> tuple[int, dict[int, float]]:
+        """Get the mask of records that match any term of the query, and their scores."""
+        scores = self.search_index.search(query)
+        return sum(1 << position for position in scores), scores
+
+    def ranked(self, mask: int, scores: dict[int, float]) -> list[T]:
+        """Get the records in `mask` by search score, highest first (ties in record order)."""
+        positions = sorted((position for position in scores if mask >> position & 1),
+                           key=lambda position: (-scores[position], position))
+        return [self.records[position] for position in positions]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Get up to `limit` (rank, name) autocomplete suggestions for a prefix."""
+        return self.prefix_index.suggest(prefix, limit)
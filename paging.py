@@ -0,0 +1,68 @@
+"""
+Cursor pagination for potion results.  Potions are listed in brew order (highest
+value first), and a page ends with a cursor naming its last potion:
+
+    after=<value>,<ingredients_key>        e.g. after=484.3,Giant's Toe,Hagraven Feathers,Wheat
+
+The next page starts right after that potion.  The cursor is turned back into the
+potion's brew order key against the table being paged, so resuming is a bisect over
+the sorted rows (or a bound for the branch-and-bound search, see bounds.best_rows),
+and no earlier potion is built again.  A cursor naming ingredients the table doesn't
+have resumes after every potion with the cursor's value.
+
+Usage:
+    from paging import Cursor, page_potions
+    page, next_cursor = page_potions(catalog.select(ingredients), 100)
+    page, next_cursor = page_potions(catalog.select(ingredients), 100, Cursor.parse(str(next_cursor)))
+"""
+
+from bisect import bisect_right
+from typing import NamedTuple
+
+from brewing import BrewTable, row_order
+
+# Longer than any combination, so a key with it sorts after every row of equal value
+PAST_COMBOS = 4
+
+
+class Cursor(NamedTuple):
+    """The value and (sorted) ingredient names of the last potion on a page."""
+    value: float
+    names: tuple[str, ...]
+
+    def __str__(self):
+        return f"{self.value!r},{','.join(self.names)}"
+
+    @staticmethod
+    def parse(text: str) -> 'Cursor':
+        """Parse "<value>,<ingredients_key>".  Raises ValueError if it's malformed."""
+        value, _, key = text.partition(',')
+        names = tuple(name for name in key.split(',') if name)
+        try:
+            return Cursor(float(value), names)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {text}")
+
+    @staticmethod
+    def of(potion) -> 'Cursor':
+        """Get the cursor that resumes after a potion."""
+        return Cursor(potion.value, tuple(sorted(ingredient.name for ingredient in potion.ingredients)))
+
+    def key(self, table: BrewTable) -> tuple:
+        """Get the cursor's potion's row_order key in a table."""
+        indexes = [table.indexes.get(name) for name in self.names]
+        if None in indexes or len(indexes) not in (2, 3):
+            return (-self.value, PAST_COMBOS, ())
+        return (-self.value, len(indexes), tuple(sorted(indexes)))
+
+
+def page_potions(potions, limit: int = None, after: Cursor = None):
+    """Get a page of a PotionList sorted in brew order: up to `limit` potions (all of
+    them if None) after the cursor, as a lazy PotionList, and the cursor for the next
+    page (None if this is the last one).
+    """
+    rows = potions.rows
+    start = bisect_right(rows, after.key(potions.table), key=row_order) if after is not None else 0
+    end = len(rows) if limit is None else min(len(rows), start + limit)
+    page = potions[start:end]
+    return page, (Cursor.of(page[-1]) if end < len(rows) and len(page) else None)
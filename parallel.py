@@ -0,0 +1,56 @@
+"""
+Multi-process brewing.  The combination space is sharded by the index of the first
+ingredient, and the shards are brewed across a ProcessPoolExecutor.  Each worker builds
+its own BrewTable once (in the pool initializer) and returns compact PotionRows, which
+the parent merges back into brew order.  When only the best N potions are wanted, each
+shard returns just its own best N, so very little crosses the process boundary.
+
+Usage:
+    from parallel import brew_rows_parallel
+    rows = brew_rows_parallel(ingredients, workers=8, limit=100)
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import heapq
+import os
+
+from brewing import BrewTable, PotionRow, iterate, row_order
+from ingredient import Ingredient
+
+# The worker's BrewTable, built once per process by the pool initializer
+_table: BrewTable = None
+
+
+def _init_worker(ingredients: list[Ingredient]):
+    global _table
+    _table = BrewTable(ingredients)
+
+
+def _brew_shard(firsts: list[int], limit: int = None) -> list[PotionRow]:
+    """Brew every potion whose first ingredient is in `firsts`, keeping the best
+    `limit` of them if a limit is given.
+    """
+    rows = (row for a in firsts for row in _table.first_rows(a))
+    if limit is not None:
+        return heapq.nsmallest(limit, rows, key=row_order)
+    return list(rows)
+
+
+def brew_rows_parallel(ingredients: list[Ingredient], workers: int = None, limit: int = None,
+                       track=iterate) -> list[PotionRow]:
+    """Brew the ingredients across `workers` processes (default: one per CPU) and
+    return the PotionRows in brew order, indexed against BrewTable(ingredients).  The
+    track hook is advanced once per finished shard, so progress is aggregated across
+    the workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    n = len(ingredients)
+    # Early first ingredients have far more combinations, so deal them round-robin
+    shards = [list(range(start, n, workers * 4)) for start in range(min(n, workers * 4))]
+    rows: list[PotionRow] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ingredients,)) as executor:
+        futures = [executor.submit(_brew_shard, shard, limit) for shard in shards]
+        for future in track(as_completed(futures), total=len(futures), description="Brewing potions"):
+            rows.extend(future.result())
+    rows.sort(key=row_order)
+    return rows[:limit]
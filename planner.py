@@ -0,0 +1,236 @@
+"""
+Batch brewing from a real inventory.  Potion.brew treats every ingredient as
+unlimited, but a player has, say, 14 Creep Cluster, 9 Mora Tapinella and 3 Giant's
+Toe, and every potion brewed uses up one of each of its ingredients.  The planner
+picks how many of each potion to brew to get the most total value out of them.
+
+The candidates are the brewed PotionRows for the ingredients on hand.  Two greedy
+passes (best value first, and best value per ingredient used first) each brew as
+many of each candidate as the inventory allows, and the better schedule is then
+improved locally: give back a potion (or two that share an ingredient), refill from
+the potions that use the freed ingredients, and keep the swap if the total goes up.
+
+Usage:
+    from planner import plan_brewing
+    plan = plan_brewing({"Creep Cluster": 14, "Mora Tapinella": 9, "Giant's Toe": 3})
+    plan = plan_brewing(parse_inventory(["Creep Cluster:14", "Mora Tapinella:9"]))
+    for step in plan.steps:
+        print(step.count, step.potion)
+"""
+
+from typing import NamedTuple
+
+from brewing import BrewTable, iter_bits, row_order
+from ingredient import Ingredient, get_ingredient_by_name
+from potion import Potion
+
+# Rounds of local improvement over the whole schedule
+MAX_PASSES = 10
+# Smallest gain worth keeping a swap for
+MIN_GAIN = 1e-9
+
+
+class PlanStep(NamedTuple):
+    potion: Potion
+    count: int
+
+
+class BrewPlan(NamedTuple):
+    """A brewing schedule: the potions to brew (best first), how many of each, their
+    total value, and the ingredients left over.
+    """
+    steps: list[PlanStep]
+    value: float
+    leftovers: dict[str, int]
+
+    @property
+    def num_potions(self) -> int:
+        return sum(step.count for step in self.steps)
+
+
+def resolve_inventory(inventory: dict[Ingredient | str, int]) -> dict[Ingredient, int]:
+    """Resolve an inventory of ingredient names and/or Ingredients to quantities of the
+    Ingredients that are valid for potion making.  Raises ValueError for unknown
+    names and negative or non-integer quantities.
+    """
+    quantities: dict[str, int] = {}
+    ingredients: dict[str, Ingredient] = {}
+    for item, count in inventory.items():
+        ingredient = get_ingredient_by_name(item) if isinstance(item, str) else item
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(f"Invalid quantity for {ingredient.name}: {count}")
+        ingredients[ingredient.name] = ingredient
+        quantities[ingredient.name] = quantities.get(ingredient.name, 0) + count
+    return {
+        ingredients[name]: count for name, count in quantities.items()
+        if count > 0 and Potion.is_valid_ingredient(ingredients[name])
+    }
+
+
+def parse_inventory(items: list[str]) -> dict[str, int]:
+    """Parse inventory entries of the form "Name:count" (a bare name counts as 1).
+    Raises ValueError for a count that isn't an integer.
+    """
+    inventory: dict[str, int] = {}
+    for item in items:
+        name, _, count = item.partition(':')
+        name = name.strip()
+        try:
+            quantity = int(count) if count.strip() else 1
+        except ValueError:
+            raise ValueError(f"Invalid quantity for {name}: {count.strip()}")
+        inventory[name] = inventory.get(name, 0) + quantity
+    return inventory
+
+
+class Planner:
+    """Plans a brewing schedule for one inventory."""
+
+    def __init__(self, inventory: dict[Ingredient | str, int]):
+        stock = resolve_inventory(inventory)
+        self.table = BrewTable(list(stock))
+        self.stock = list(stock.values())
+        self.rows = sorted(self.table.rows(), key=row_order)
+        # Index into self.rows by combination, and each row's ingredients as a mask
+        self.indexes = {row.combo: index for index, row in enumerate(self.rows)}
+        self.members = [sum(1 << ingredient for ingredient in row.combo) for row in self.rows]
+
+    @staticmethod
+    def in_stock(remaining: list[int]) -> int:
+        """Get the mask of ingredients that haven't run out."""
+        return sum(1 << ingredient for ingredient, count in enumerate(remaining) if count)
+
+    def fill(self, order: list[int], remaining: list[int], counts: dict[int, int], available: int = None) -> float:
+        """Brew as many of each row in `order` as `remaining` allows, adding them to
+        `counts`.  `available` is the in_stock mask of `remaining`, if already known.
+        Returns the value brewed.
+        """
+        value = 0.0
+        if available is None:
+            available = self.in_stock(remaining)
+        for index in order:
+            if self.members[index] & ~available:
+                continue
+            combo = self.rows[index].combo
+            count = min(remaining[ingredient] for ingredient in combo)
+            for ingredient in combo:
+                remaining[ingredient] -= count
+                if not remaining[ingredient]:
+                    available &= ~(1 << ingredient)
+            counts[index] = counts.get(index, 0) + count
+            value += count * self.rows[index].value
+        return value
+
+    def refills(self, freed: tuple[int, ...], available: int) -> set[int]:
+        """Get the rows that use one of the `freed` ingredients and otherwise only the
+        `available` ones.  They're found by walking the adjacency graph among the
+        available ingredients, since after a greedy fill there are only a few.
+        """
+        neighbors = self.table.neighbors
+        indexes = self.indexes
+        found = set()
+        for a in freed:
+            for b in iter_bits(neighbors[a] & available):
+                found.add(indexes[(a, b) if a < b else (b, a)])
+                for c in iter_bits((neighbors[a] | neighbors[b]) & available & ~(1 << a | 1 << b)):
+                    low, high = min(a, b, c), max(a, b, c)
+                    index = indexes.get((low, a + b + c - low - high, high))
+                    if index is not None:
+                        found.add(index)
+        return found
+
+    def greedy(self, rank: list[int]) -> tuple[dict[int, int], list[int], float]:
+        remaining = list(self.stock)
+        counts: dict[int, int] = {}
+        value = self.fill(sorted(range(len(self.rows)), key=rank.__getitem__), remaining, counts)
+        return counts, remaining, value
+
+    def swap(self, rank: list[int], counts: dict[int, int], remaining: list[int],
+             given_back: tuple[int, ...]) -> tuple[float, dict[int, int], list[int]] | None:
+        """Try giving back one of each potion in `given_back` and refilling from the
+        ingredients that frees up.  Each refill candidate is tried first, with the rest
+        filled greedily after it.  Returns the best (gain, counts, remaining) if it
+        raises the total value, otherwise None.
+        """
+        freed = list(remaining)
+        released = dict(counts)
+        for index in given_back:
+            released[index] = released.get(index, 0) - 1
+            for ingredient in self.rows[index].combo:
+                freed[ingredient] += 1
+        if any(released[index] < 0 for index in given_back):
+            return None
+        loss = sum(self.rows[index].value for index in given_back)
+        ingredients = tuple({ingredient for index in given_back for ingredient in self.rows[index].combo})
+        available = self.in_stock(freed)
+        candidates = [
+            index for index in sorted(self.refills(ingredients, available), key=rank.__getitem__)
+            if index not in given_back
+        ]
+        best = None
+        for first in candidates:
+            trial_counts = dict(released)
+            trial_remaining = list(freed)
+            gain = self.fill([first] + candidates, trial_remaining, trial_counts, available) - loss
+            if gain > MIN_GAIN and (best is None or gain > best[0]):
+                best = gain, trial_counts, trial_remaining
+        return best
+
+    def improve(self, rank: list[int], counts: dict[int, int], remaining: list[int], value: float) -> float:
+        """Swap potions for refills while that raises the total value.  After a greedy
+        fill every row is blocked by some used-up ingredient, so only rows using the
+        ingredients given back can be refilled.  Single potions are given back first,
+        and pairs of potions sharing an ingredient once that stops paying off.
+        """
+        for _ in range(MAX_PASSES):
+            scheduled = sorted(counts, key=rank.__getitem__)
+            singles = [(index,) for index in scheduled]
+            pairs = [
+                (a, b) for position, a in enumerate(scheduled) for b in scheduled[position:]
+                if self.members[a] & self.members[b]
+            ]
+            improved = False
+            for moves in (singles, pairs):
+                for given_back in moves:
+                    best = self.swap(rank, counts, remaining, given_back)
+                    if best is not None:
+                        gain, trial_counts, trial_remaining = best
+                        counts.clear()
+                        counts.update((key, count) for key, count in trial_counts.items() if count)
+                        remaining[:] = trial_remaining
+                        value += gain
+                        improved = True
+                if improved:
+                    break
+            if not improved:
+                break
+        return value
+
+    def plan(self) -> BrewPlan:
+        by_value = list(range(len(self.rows)))
+        # Rank by value per ingredient used, ties in brew order
+        per_ingredient = sorted(by_value, key=lambda index: (-self.rows[index].value / len(self.rows[index].combo), index))
+        by_density = [0] * len(self.rows)
+        for position, index in enumerate(per_ingredient):
+            by_density[index] = position
+
+        # Improve whichever greedy schedule starts out better
+        starts = [(self.greedy(rank), rank) for rank in (by_value, by_density)]
+        (counts, remaining, value), rank = max(starts, key=lambda start: start[0][2])
+        self.improve(rank, counts, remaining, value)
+
+        steps = [
+            PlanStep(Potion.from_row(self.table, self.rows[index]), count)
+            for index, count in sorted(counts.items())
+        ]
+        leftovers = {
+            ingredient.name: count for ingredient, count in zip(self.table.ingredients, remaining) if count
+        }
+        return BrewPlan(steps, sum(step.count * step.potion.value for step in steps), leftovers)
+
+
+def plan_brewing(inventory: dict[Ingredient | str, int]) -> BrewPlan:
+    """Plan which potions to brew, and how many of each, to get the most total value
+    out of an inventory of ingredient quantities.
+    """
+    return Planner(inventory).plan()
@@ -8,15 +8,24 @@ Usage:
     from potion import Potion
     potions = Potion.brew(["Wheat", "Garlic"])
     print(potions)
+    best = Potion.brew_top(["Wheat", "Garlic", "Blue Mountain Flower"], 10)
 """
 
 from pydantic import BaseModel
 from typing import Callable, Iterator, TypeVar, Any
 from effect import Effect
-from ingredient import Ingredient, ActiveEffect, get_ingredient_by_name
+from ingredient import AllIngredientsByName, Ingredient, ActiveEffect, IngredientsByEffect, get_ingredient_by_name
+from brewing import BrewTable, PotionRow, bits_above, get_effect_mask, iter_bits
+from bounds import SLACK, BoundTable, best_rows
+from paging import Cursor
+from functools import reduce
+from vectorized import ArrayRows, VectorTable
+from parallel import brew_rows_parallel
 from itertools import combinations as itertools_combinations
-from math import comb
 from rich.progress import track as iterate
+import heapq
+from collections.abc import Sequence
+from operator import attrgetter
 
 def iterate(items, **kwargs):
     """This is the 'non-progress bar' iterator.  Useful for embedded behavior (like web server)."""
@@ -30,6 +39,34 @@ def combinations(items: list[Any]) -> Iterator[tuple[Any, ...]]:
     for r in range(2, min(4, len(items) + 1)):
         yield from itertools_combinations(items, r)
 
+_full_table: BrewTable = None
+
+def get_full_table() -> BrewTable:
+    """Get a BrewTable over every loaded ingredient that's valid for potion making.  It's
+    built once and rebuilt only if the ingredient data has been reloaded.
+    """
+    global _full_table
+    ingredients = [ingredient for ingredient in AllIngredientsByName.values() if Potion.is_valid_ingredient(ingredient)]
+    if _full_table is None or len(_full_table) != len(ingredients) or \
+            any(a is not b for a, b in zip(_full_table.ingredients, ingredients)):
+        _full_table = BrewTable(ingredients)
+    return _full_table
+
+_full_bounds: BoundTable = None
+
+def get_full_bounds() -> BoundTable:
+    """Get the value bounds (see bounds.py) for get_full_table(), built once per table."""
+    global _full_bounds
+    table = get_full_table()
+    if _full_bounds is None or _full_bounds.table is not table:
+        _full_bounds = BoundTable(table)
+    return _full_bounds
+
+RecipeSortKeys: dict[str, Callable[[PotionRow], float]] = {
+    'value': lambda row: row.value,
+    'efficiency': lambda row: row.value / row.cost if row.cost else 0.0,
+}
+
 class Potion(BaseModel):
     """A Potion is a magical elixir that can be created by combining ingredients.  Each
     potion has a list of ActiveEffects that it produces, a list of ingredients used to
@@ -123,13 +160,10 @@ class Potion(BaseModel):
         return ingredient.name not in {"Jarrin Root"}
 
     @staticmethod
-    def brew(ingredients: list[Ingredient | str], track=iterate) -> list['Potion']:
-        """Brew potions from a list of ingredients.  The brew method takes a list of
-        ingredients and returns a list of potions that can be created from those
-        ingredients.  The track parameter is a function that takes an iterable and
-        returns an iterator that can be used to track progress.  By default, it
-        returns the original iterable unchanged.  You can use the track parameter
-        to provide a progress bar or other tracking mechanism.
+    def resolve_ingredients(ingredients: list[Ingredient | str]) -> list[Ingredient]:
+        """Resolve a list of ingredient names and/or Ingredient objects to the list of
+        Ingredients that are valid for potion making.  Raises TypeError if ingredients
+        isn't a list, and ValueError for unknown names or unsupported item types.
         """
         if ingredients is None:
             raise TypeError("ingredients cannot be None")
@@ -147,20 +181,236 @@ class Potion(BaseModel):
                 raise ValueError(f"Invalid ingredient type: {type(item)}. Must be string or Ingredient.")
                 
         # Filter out invalid ingredients
-        processed_ingredients = [i for i in processed_ingredients if Potion.is_valid_ingredient(i)]
-                
-        potions: list['Potion'] = list()
-        n = len(processed_ingredients)
-        
-        # Try 2 and 3 ingredients with separate progress bars
-        for active_ingredients in track(combinations(processed_ingredients), 
-                                         total=comb(n, 2) + comb(n, 3),
-                                         description=f"Brewing potions"):
-            active_effects: list[ActiveEffect] = Ingredient.combine(active_ingredients)
-            if len(active_effects) > 0:
-                value = Effect.get_value(active_effects)
-                cost = sum(ingredient.value for ingredient in active_ingredients)
-                potions.append(Potion(active_effects=active_effects, ingredients=active_ingredients, value=value, cost=cost))
-        
-        potions.sort(key=lambda potion: potion.value, reverse=True)
-        return potions
+        return [i for i in processed_ingredients if Potion.is_valid_ingredient(i)]
+
+    @staticmethod
+    def from_row(table: BrewTable, row: PotionRow) -> 'Potion':
+        """Build the Potion for a compact row brewed from a BrewTable."""
+        return Potion(
+            active_effects=table.active_effects(row.combo, row.mask),
+            ingredients=[table.ingredients[index] for index in row.combo],
+            value=row.value,
+            cost=row.cost,
+        )
+
+    @staticmethod
+    def from_combo(table: BrewTable, combo: tuple[int, ...], mask: int) -> 'Potion':
+        """Build the Potion for a combination of ingredients in a BrewTable."""
+        return Potion.from_row(table, table.row(combo, mask))
+
+    @staticmethod
+    def iter_brew(ingredients: list[Ingredient | str], track=iterate) -> Iterator['Potion']:
+        """Brew potions lazily.  Potions are yielded as they're found, in combination
+        order rather than by value, so nothing is held in memory or sorted.  The
+        ingredients are resolved up front, so bad input raises immediately.
+        """
+        table = BrewTable(Potion.resolve_ingredients(ingredients))
+        # Only pairs that share an effect, and triples where every ingredient contributes
+        return (Potion.from_row(table, row) for row in table.rows(track=track))
+
+    @staticmethod
+    def brew_lazy(ingredients: list[Ingredient | str], track=iterate, vectorized: bool = False) -> 'PotionList':
+        """Brew potions into a PotionList, sorted by value from highest to lowest.  The
+        potions are held as compact rows and only become Potion objects when they're
+        read, so a large brew doesn't keep hundreds of thousands of models alive.
+        """
+        processed_ingredients = Potion.resolve_ingredients(ingredients)
+        table = BrewTable(processed_ingredients)
+        if vectorized:
+            # The rows stay NumPy columns, read as PotionRows only when they're used
+            vector_table = VectorTable(processed_ingredients)
+            combos, values = vector_table.brew(track=track)
+            rows = ArrayRows(table, combos, values, vector_table.costs_of(combos))
+        else:
+            rows = list(table.rows(track=track))
+            rows.sort(key=attrgetter('value'), reverse=True)
+        return PotionList(table, rows)
+
+    @staticmethod
+    def brew(ingredients: list[Ingredient | str], track=iterate) -> list['Potion']:
+        """Brew potions from a list of ingredients.  The brew method takes a list of
+        ingredients and returns a list of potions that can be created from those
+        ingredients.  As in the game, every ingredient of a three-ingredient potion
+        must contribute at least one of its effects.  The track parameter is a
+        function that takes an iterable and returns an iterator that can be used to
+        track progress.  By default, it returns the original iterable unchanged.  You
+        can use the track parameter to provide a progress bar or other tracking
+        mechanism.
+        """
+        return list(Potion.brew_lazy(ingredients, track=track))
+
+    @staticmethod
+    def brew_top(ingredients: list[Ingredient | str], limit: int, key: Callable[['Potion'], Any] = None,
+                 track=iterate, after: Cursor = None) -> list['Potion']:
+        """Brew only the best `limit` potions, highest first.  With the default key
+        (value), a branch-and-bound search (see bounds.py) skips every combination that
+        can't make the top `limit`, returns the same list as brew(ingredients)[:limit],
+        and only turns the winning rows into Potion objects.  Given a cursor (see
+        paging.py), it returns the `limit` potions that follow it instead.  With any
+        other key, a bounded heap keeps just the current top `limit`, so memory is
+        O(limit) and the full sort is skipped.  Cursors are in value order, so they
+        can't be combined with a key (that raises ValueError).
+        """
+        if key is not None and after is not None:
+            raise ValueError("A cursor can only be used with the default (value) order")
+        table = BrewTable(Potion.resolve_ingredients(ingredients))
+        if key is None:
+            rows = best_rows(table, limit, after=after.key(table) if after is not None else None, track=track)
+            return [Potion.from_row(table, row) for row in rows]
+        potions = (Potion.from_row(table, row) for row in table.rows(track=track))
+        return heapq.nlargest(limit, potions, key=key)
+
+    @staticmethod
+    def count_potions(ingredients: list[Ingredient | str]) -> int:
+        """Count the potions brew would return, without building any of them."""
+        table = BrewTable(Potion.resolve_ingredients(ingredients))
+        return sum(1 for _ in table.potion_combos())
+
+    @staticmethod
+    def brew_vectorized(ingredients: list[Ingredient | str], track=iterate, limit: int = None) -> list['Potion']:
+        """Brew potions using the NumPy engine.  Every pair and triple is evaluated in
+        batched array operations rather than a Python loop, which pays off for large
+        ingredient lists.  Returns the same potions, in the same order, as brew.  If a
+        limit is given, only the best `limit` potions are built.
+        """
+        return list(Potion.brew_lazy(ingredients, track=track, vectorized=True)[:limit])
+
+    @staticmethod
+    def brew_parallel(ingredients: list[Ingredient | str], workers: int = None, track=iterate,
+                      limit: int = None) -> list['Potion']:
+        """Brew potions across several processes (default: one per CPU).  Returns the same
+        potions, in the same order, as brew.  If a limit is given, each worker only sends
+        back its best `limit` potions and only the overall best `limit` are built.
+        """
+        processed_ingredients = Potion.resolve_ingredients(ingredients)
+        table = BrewTable(processed_ingredients)
+        rows = brew_rows_parallel(processed_ingredients, workers=workers, limit=limit, track=track)
+        return list(PotionList(table, rows))
+
+    @staticmethod
+    def find_recipes(effects: list[Effect | str], farmable: bool = False, exclude: list[Ingredient | str] = (),
+                     max_cost: float = None, sort_by: str = 'value', limit: int = None) -> list['Potion']:
+        """Find the recipes (pairs and triples of ingredients) that brew a potion with all
+        of the requested effects, best first by `sort_by` ('value' or 'efficiency').
+        Optionally only farmable ingredients, never the excluded ones, and no more
+        than `max_cost` in ingredients.
+
+        Only ingredients that have a requested effect are used to build candidates (a
+        pair needs both to have every requested effect, and a triple needs at least
+        two holders of each).  A third ingredient must hold every requested effect the
+        pair doesn't share, and each triple is only tried from its two lowest
+        candidates, so the full combination space is never searched.  With a limit,
+        triples whose value bound (see bounds.py) can't make the best `limit` aren't
+        brewed, and only the best `limit` rows are sorted and turned into Potions.
+        """
+        if sort_by not in RecipeSortKeys:
+            raise ValueError(f"Invalid sort: {sort_by}. Must be one of {', '.join(RecipeSortKeys)}.")
+        effect_names = [effect.name if isinstance(effect, Effect) else effect for effect in effects]
+        if not effect_names:
+            raise ValueError("At least one effect is required")
+        for name in effect_names:
+            if name not in IngredientsByEffect:
+                raise ValueError(f"Unknown effect: {name}")
+        excluded = {item if isinstance(item, str) else item.name for item in exclude}
+        for name in excluded:
+            get_ingredient_by_name(name)
+
+        table = get_full_table()
+        allowed = 0
+        for index, ingredient in enumerate(table.ingredients):
+            if ingredient.name not in excluded and (ingredient.farmable or not farmable):
+                allowed |= 1 << index
+        holders = [
+            sum(1 << table.indexes[ingredient.name] for ingredient in IngredientsByEffect[name]
+                if ingredient.name in table.indexes) & allowed
+            for name in effect_names
+        ]
+        required = get_effect_mask(effect_names)
+        candidates = reduce(lambda bits, holder: bits | holder, holders, 0)
+        # Ingredients holding every requested effect are the only ones that can pair up
+        complete = reduce(lambda bits, holder: bits & holder, holders, allowed)
+
+        holders_by_bit = dict(zip((get_effect_mask([name]) for name in effect_names), holders))
+        costs = [ingredient.value for ingredient in table.ingredients]
+        key = RecipeSortKeys[sort_by]
+        # With a limit: the sort values of the best `limit` rows so far (the smallest is
+        # the bar to beat), and the value bounds that skip what can't beat it
+        bounds = get_full_bounds() if limit is not None else None
+        kth: list[float] = []
+
+        def beaten(bound: float, cost: float) -> bool:
+            """Check that nothing with this value bound and cost can make the best `limit`."""
+            if len(kth) < limit:
+                return False
+            if sort_by == 'efficiency':
+                bound = bound / cost if cost else 0.0
+            return bound + SLACK * (1 + bound) < kth[0]
+
+        rows: list[PotionRow] = []
+        def consider(combo: tuple[int, ...], cost: float):
+            if max_cost is not None and cost > max_cost:
+                return
+            mask = table.shared_mask(combo)
+            if mask & required != required or not all(table.masks[index] & mask for index in combo):
+                return
+            row = table.row(combo, mask)
+            if limit is not None:
+                value = key(row)
+                if len(kth) < limit:
+                    heapq.heappush(kth, value)
+                elif value >= kth[0]:
+                    heapq.heapreplace(kth, value)
+                else:
+                    return
+            rows.append(row)
+
+        pairs = list(itertools_combinations(iter_bits(candidates), 2))
+        if bounds is not None:
+            # Most promising pairs first, so the bar rises quickly
+            pairs.sort(key=lambda pair: -bounds.sharing_bound(*pair))
+        for a, b in pairs:
+            shared = table.masks[a] & table.masks[b]
+            pair_cost = costs[a] + costs[b]
+            if complete >> a & 1 and complete >> b & 1:
+                consider((a, b), pair_cost)
+            # Every triple with this pair costs more, so its efficiency is lower too
+            if bounds is not None and (sort_by == 'value' or pair_cost) and beaten(bounds.sharing_bound(a, b), pair_cost):
+                continue
+            # The third must share an effect with the pair (to contribute one), and hold
+            # every requested effect the pair doesn't share (and that one of them has)
+            thirds = (table.neighbors[a] | table.neighbors[b]) & allowed & ~(1 << a | 1 << b)
+            missing = required & ~shared
+            for bit, holder in holders_by_bit.items():
+                if missing & bit:
+                    thirds &= holder if (table.masks[a] | table.masks[b]) & bit else 0
+            # A triple with three candidates is only tried from its two lowest
+            thirds &= ~candidates | bits_above(candidates, b)
+            for c in iter_bits(thirds):
+                x, y, z = (a, b, c) if c > b else (a, c, b) if c > a else (c, a, b)
+                cost = costs[x] + costs[y] + costs[z]
+                if bounds is not None and beaten(bounds.triple_bound(x, y, z), cost):
+                    continue
+                consider((x, y, z), cost)
+
+        sort_key = lambda row: (-key(row), len(row.combo), row.combo)
+        best = sorted(rows, key=sort_key) if limit is None else heapq.nsmallest(limit, rows, key=sort_key)
+        return [Potion.from_row(table, row) for row in best]
+
+
+class PotionList(Sequence):
+    """A read-only list of brewed potions backed by compact PotionRows.  Indexing or
+    iterating builds the Potion objects on demand; slicing returns another PotionList
+    without building anything.
+    """
+
+    def __init__(self, table: BrewTable, rows: list[PotionRow]):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PotionList(self.table, self.rows[index])
+        return Potion.from_row(self.table, self.rows[index])
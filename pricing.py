@@ -0,0 +1,150 @@
+"""
+Potion prices for a particular character.  A potion's value (Potion.value) only
+depends on its ingredients, but what it sells for also depends on the player's
+Alchemy skill, the Alchemist, Physician, Benefactor and Poisoner perks, and any
+Fortify Alchemy gear.  Those all scale the potion's magnitudes by a power factor:
+
+    factor = 4 * (1 + skill / 200) * (1 + alchemist / 100) * (1 + fortify_alchemy / 100)
+               * (1 + physician / 100)                  restore health, magicka, stamina
+               * (1 + benefactor / 100 + poisoner / 100)  beneficial or offensive effects
+
+Each active effect's magnitude (or its duration, for effects that have none) is its
+base magnitude times the ingredients' power product times the factor, and its price
+is Effect.value's formula on that magnitude, times the ingredients' value product:
+
+    price = floor(cost * magnitude^1.1 * (duration / 10)^1.1 * value)
+
+A PriceTable holds the per-effect base terms and per-ingredient power and value
+multipliers as arrays, so repricing a whole brewed catalog for new parameters is a
+handful of NumPy operations over its rows, without brewing anything again.
+
+Usage:
+    from pricing import Pricing, PriceTable
+    pricing = Pricing(skill=100, alchemist=5, physician=True, benefactor=True)
+    prices = PriceTable(potions.table).price_potions(potions, pricing)
+"""
+
+from typing import NamedTuple
+import numpy as np
+
+from brewing import BrewTable, EffectBits, get_effect_bit
+from effect import AllEffectsByName, DUR_FACTOR, DUR_POW, MAG_POW
+
+ALCHEMIST_RANK = 20      # percent per rank of the Alchemist perk (5 ranks)
+PHYSICIAN_BONUS = 25     # percent, restore health, magicka and stamina effects
+BENEFACTOR_BONUS = 25    # percent, beneficial effects
+POISONER_BONUS = 25      # percent, offensive effects
+PHYSICIAN_EFFECTS = ('Restore Health', 'Restore Magicka', 'Restore Stamina')
+
+# Rows priced per batch, which bounds the (rows x effects) working arrays
+BATCH_ROWS = 8192
+
+
+class Pricing(NamedTuple):
+    """The character parameters that affect potion prices."""
+    skill: int = 15
+    alchemist: int = 0          # Alchemist perk rank, 0 to 5
+    physician: bool = False
+    benefactor: bool = False
+    poisoner: bool = False
+    fortify_alchemy: float = 0.0  # percent, from Fortify Alchemy gear
+
+    def validate(self) -> 'Pricing':
+        """Raise ValueError for parameters outside the game's ranges."""
+        if not 0 <= self.skill <= 100:
+            raise ValueError(f"Invalid skill: {self.skill}. Must be 0 to 100.")
+        if not 0 <= self.alchemist <= 5:
+            raise ValueError(f"Invalid alchemist rank: {self.alchemist}. Must be 0 to 5.")
+        if self.fortify_alchemy < 0:
+            raise ValueError(f"Invalid fortify alchemy: {self.fortify_alchemy}. Must not be negative.")
+        return self
+
+    @property
+    def base_factor(self) -> float:
+        """The power factor from skill, Alchemist and Fortify Alchemy, which applies to
+        every effect.
+        """
+        return 4 * (1 + self.skill / 200) * (1 + self.alchemist * ALCHEMIST_RANK / 100) * \
+            (1 + self.fortify_alchemy / 100)
+
+
+class PriceTable:
+    """Pricing arrays for the ingredients of a BrewTable, indexed by effect bit.  The
+    per-effect arrays have one extra column and the per-ingredient arrays one extra
+    row, for effects and ingredients that don't exist (padding).
+    """
+
+    def __init__(self, table: BrewTable):
+        self.table = table
+        # Make sure every effect in the effect list has a bit, so they all get priced
+        for name in AllEffectsByName:
+            get_effect_bit(name)
+        bits = len(EffectBits)
+        self.cost = np.zeros(bits + 1)
+        self.mag = np.zeros(bits + 1)
+        self.dur = np.zeros(bits + 1)
+        self.physician = np.zeros(bits + 1, dtype=bool)
+        self.offensive = np.zeros(bits + 1, dtype=bool)
+        for name, bit in EffectBits.items():
+            effect = AllEffectsByName.get(name)
+            # Effects missing from the effect list (no cost) are priced at 0
+            if effect is not None:
+                self.cost[bit], self.mag[bit], self.dur[bit] = effect.cost, effect.mag, effect.dur
+                self.physician[bit] = name in PHYSICIAN_EFFECTS
+                self.offensive[bit] = effect.type == 'Offensive'
+        n = len(table)
+        self.has = np.zeros((n + 1, bits + 1), dtype=bool)
+        self.powers = np.ones((n + 1, bits + 1))
+        self.values = np.ones((n + 1, bits + 1))
+        for index, slots in enumerate(table.slots):
+            for bit, _, power, value in slots:
+                self.has[index, bit] = True
+                self.powers[index, bit] = power
+                self.values[index, bit] = value
+
+    def factors(self, pricing: Pricing) -> np.ndarray:
+        """Get the power factor for each effect bit."""
+        factors = np.full(self.cost.shape, pricing.base_factor)
+        if pricing.physician:
+            factors[self.physician] *= 1 + PHYSICIAN_BONUS / 100
+        perk = np.where(self.offensive, POISONER_BONUS if pricing.poisoner else 0,
+                        BENEFACTOR_BONUS if pricing.benefactor else 0)
+        return factors * (1 + perk / 100)
+
+    def prices(self, combos: np.ndarray, pricing: Pricing) -> np.ndarray:
+        """Price potions given as an int array of ingredient indices into the table, one
+        row per potion, padded with -1 (as in the catalog).
+        """
+        combos = np.asarray(combos, dtype=np.intp).reshape(len(combos), -1)
+        combos = np.where(combos < 0, len(self.table), combos)
+        factors = self.factors(pricing)
+        scaled = self.mag > 0
+        prices = np.zeros(len(combos))
+        for start in range(0, len(combos), BATCH_ROWS):
+            batch = combos[start:start + BATCH_ROWS]
+            counts = np.zeros((len(batch), len(self.cost)), dtype=np.int8)
+            power = np.ones((len(batch), len(self.cost)))
+            value = np.ones((len(batch), len(self.cost)))
+            for slot in range(batch.shape[1]):
+                counts += self.has[batch[:, slot]]
+                power *= self.powers[batch[:, slot]]
+                value *= self.values[batch[:, slot]]
+            active = counts >= 2
+            boost = power * factors
+            mag = np.where(scaled, np.round(self.mag * boost), 0)
+            dur = np.where(scaled, self.dur, np.round(self.dur * boost))
+            price = self.cost * value
+            price = np.where(mag > 0, price * np.maximum(mag, 0) ** MAG_POW, price)
+            price = np.where(dur > 0, price * np.maximum(dur, 0) ** DUR_POW * DUR_FACTOR, price)
+            prices[start:start + len(batch)] = np.where(active, np.floor(price), 0).sum(axis=1)
+        return prices
+
+    def price_potions(self, potions, pricing: Pricing) -> np.ndarray:
+        """Price every potion in a PotionList brewed from the table, in list order."""
+        rows = potions.rows
+        combos = getattr(rows, 'ingredients', None)
+        if combos is None:
+            combos = np.full((len(rows), 3), -1, dtype=np.intp)
+            for index, row in enumerate(rows):
+                combos[index, :len(row.combo)] = row.combo
+        return self.prices(combos, pricing)
@@ -0,0 +1,171 @@
+"""
+Registries hold the master lists of records (effects, ingredients) by name.  A
+registry isn't loaded when it's created: it loads its data file the first time
+it's read, or when load is called explicitly, so importing a module that defines
+one costs nothing until the data is actually used.
+
+Registries are read-only Mappings, so the module-level names that used to be plain
+dicts (AllEffectsByName, AllIngredientsByName) keep working as lazy proxies.  A
+RegistryView holds data derived from a registry (like the listing indexes), and a
+RegistryIndex is a Mapping derived from one (like ingredients by effect).  Both are
+built on first access and rebuilt whenever the registry is reloaded.
+
+Registries holds several named registries of the same kind of record, so a process
+can work with more than one dataset.  The "default" one is loaded from the
+default data file and backs the module-level names.
+
+Usage:
+    from registry import Registries
+    effects = Registries(Effect.from_file, 'effects.yaml')
+    effects.default['Restore Health']                # loads effects.yaml
+    effects.add('modded', 'mods/effects.yaml')       # loaded on first access
+    effects.load('modded', 'mods/effects.yaml')      # or loaded right now
+"""
+
+from collections.abc import Mapping
+from threading import RLock
+from typing import Callable, Generic, Iterator, TypeVar
+
+T = TypeVar('T')
+V = TypeVar('V')
+
+DEFAULT_DATASET = 'default'
+
+
+class Registry(Mapping[str, T]):
+    """Records by name, loaded from a data file on first access.  Every (re)load
+    bumps the version, which is how derived indexes know to rebuild.
+    """
+
+    def __init__(self, load_records: Callable[[str], list[T]], filename: str):
+        self.load_records = load_records
+        self.filename = filename
+        self.version = 0
+        self._records: dict[str, T] = None
+        self._lock = RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._records is not None
+
+    @property
+    def records(self) -> dict[str, T]:
+        """The records by name, loading them if they haven't been yet."""
+        records = self._records
+        if records is None:
+            with self._lock:
+                if self._records is None:
+                    self.load()
+                records = self._records
+        return records
+
+    def state(self) -> tuple[int, dict[str, T]]:
+        """Get the version and the records it goes with, loading them if needed."""
+        with self._lock:
+            return self.version, self.records
+
+    def load(self, filename: str = None) -> 'Registry[T]':
+        """(Re)load the records now, from `filename` if given, otherwise from the
+        registry's own data file.
+        """
+        records = {record.name: record for record in self.load_records(filename or self.filename)}
+        with self._lock:
+            self._records = records
+            self.version += 1
+        return self
+
+    def __getitem__(self, name: str) -> T:
+        return self.records[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name) -> bool:
+        return name in self.records
+
+    def keys(self):
+        return self.records.keys()
+
+    def values(self):
+        return self.records.values()
+
+    def items(self):
+        return self.records.items()
+
+    def get(self, name: str, default=None):
+        return self.records.get(name, default)
+
+
+class RegistryView(Generic[V]):
+    """Data built from a registry's records by `build`.  It's built on first access
+    and rebuilt after the registry is reloaded.
+    """
+
+    def __init__(self, registry: Registry, build: Callable[[list], V]):
+        self.registry = registry
+        self.build = build
+        self._version = None
+        self._data: V = None
+
+    @property
+    def data(self) -> V:
+        if self._version != self.registry.version or self._data is None:
+            version, records = self.registry.state()
+            self._data = self.build(list(records.values()))
+            self._version = version
+        return self._data
+
+
+class RegistryIndex(RegistryView[dict], Mapping[str, V]):
+    """A Mapping built from a registry's records by `build`."""
+
+    def __getitem__(self, key) -> V:
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
+class Registries(Generic[T]):
+    """Named registries of one kind of record, one per dataset."""
+
+    def __init__(self, load_records: Callable[[str], list[T]], filename: str):
+        self.load_records = load_records
+        self.default: Registry[T] = Registry(load_records, filename)
+        self.registries: dict[str, Registry[T]] = {DEFAULT_DATASET: self.default}
+
+    def __getitem__(self, name: str) -> Registry[T]:
+        try:
+            return self.registries[name]
+        except KeyError:
+            raise ValueError(f"Unknown dataset: {name}")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.registries
+
+    def add(self, name: str, filename: str) -> Registry[T]:
+        """Add a dataset that's loaded from `filename` on first access."""
+        registry = self.registries[name] = Registry(self.load_records, filename)
+        return registry
+
+    def load(self, name: str, filename: str = None) -> Registry[T]:
+        """Load a dataset now.  A new dataset needs a filename; an existing one is
+        reloaded from `filename` if given, otherwise from its own data file.
+        """
+        if name not in self.registries:
+            if filename is None:
+                raise ValueError(f"Unknown dataset: {name}")
+            return self.add(name, filename).load()
+        return self.registries[name].load(filename)
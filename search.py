@@ -0,0 +1,138 @@
+"""
+Full-text search and autocomplete for the listing pages.
+
+A SearchIndex covers a few text fields of each record (an ingredient's name and
+category, an effect's name and description), normalized to lower case with the
+{mag} and {dur} placeholders stripped.  Every 1, 2 and 3 character gram of the text
+has a posting list, a bitmask of the records that contain it.  A search term is
+matched as a substring, as before, but only the records in the AND of its grams'
+postings are checked (for terms of up to 3 characters the posting is the answer).
+A record matches if any term does, and it's scored by where the terms matched:
+
+    whole word 3, start of a word 2, elsewhere 1, times the field's weight
+
+A PrefixIndex answers autocomplete.  It keeps the names, and every suffix of a name
+that starts a word ("mountain flower" for "Blue Mountain Flower"), in sorted lists,
+so a prefix is a bisect plus a short scan.  Names that start with the prefix come
+before names with a later word that does.
+
+Usage:
+    from search import PrefixIndex, SearchIndex
+    index = SearchIndex(ingredients, {'name': (lambda i: i.name, 3.0)})
+    scores = index.search("root flower")        # position -> score
+    names = PrefixIndex([i.name for i in ingredients]).suggest("moun", limit=10)
+"""
+
+from bisect import bisect_left
+import re
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar('T')
+
+PLACEHOLDER = re.compile(r'\{\w+\}')
+WORD = re.compile(r"[a-z0-9']+")
+MAX_GRAM = 3
+# Score for a term found as a whole word, at the start of a word, or anywhere else
+WHOLE_WORD, WORD_START, SUBSTRING = 3, 2, 1
+
+
+def normalize(text: str) -> str:
+    """Lower case, with the {mag}/{dur} placeholders removed and spaces collapsed."""
+    return ' '.join(PLACEHOLDER.sub(' ', text or '').lower().split())
+
+
+def get_grams(text: str) -> set[str]:
+    """Get every substring of the text of up to MAX_GRAM characters."""
+    return {text[start:start + size] for size in range(1, MAX_GRAM + 1) for start in range(len(text) - size + 1)}
+
+
+class SearchIndex(Generic[T]):
+    """Gram posting lists over the text fields of a list of records."""
+
+    def __init__(self, records: list[T], fields: dict[str, tuple[Callable[[T], str], float]]):
+        self.weights = [weight for _, weight in fields.values()]
+        # Per record: normalized text and words of each field
+        self.texts = [[normalize(text(record)) for text, _ in fields.values()] for record in records]
+        self.words = [[set(WORD.findall(text)) for text in texts] for texts in self.texts]
+        self.postings: dict[str, int] = {}
+        for position, texts in enumerate(self.texts):
+            for text in texts:
+                for gram in get_grams(text):
+                    self.postings[gram] = self.postings.get(gram, 0) | 1 << position
+
+    def candidates(self, term: str) -> int:
+        """Get the mask of records that may contain the term: the AND of its grams'
+        postings (exactly the records that do, for a term of up to MAX_GRAM characters).
+        """
+        if len(term) <= MAX_GRAM:
+            return self.postings.get(term, 0)
+        mask = -1
+        for start in range(len(term) - MAX_GRAM + 1):
+            mask &= self.postings.get(term[start:start + MAX_GRAM], 0)
+            if not mask:
+                break
+        return mask
+
+    def score(self, position: int, term: str) -> float:
+        """Score a term against a record, 0 if it doesn't occur in any field."""
+        total = 0.0
+        for text, words, weight in zip(self.texts[position], self.words[position], self.weights):
+            if term not in text:
+                continue
+            if term in words:
+                total += WHOLE_WORD * weight
+            elif any(word.startswith(term) for word in words):
+                total += WORD_START * weight
+            else:
+                total += SUBSTRING * weight
+        return total
+
+    def search(self, query: str) -> dict[int, float]:
+        """Get the records that contain any of the query's terms, by position, with
+        their scores.
+        """
+        scores: dict[int, float] = {}
+        for term in normalize(query).split():
+            mask = self.candidates(term)
+            while mask:
+                low = mask & -mask
+                position = low.bit_length() - 1
+                mask ^= low
+                score = self.score(position, term)
+                if score:
+                    scores[position] = scores.get(position, 0.0) + score
+        return scores
+
+
+class PrefixIndex:
+    """Sorted names, and their word suffixes, for prefix lookups."""
+
+    def __init__(self, names: list[str]):
+        self.names = sorted((name.lower(), name) for name in names)
+        self.suffixes = sorted(
+            (name.lower()[match.start():], name) for name in names
+            for match in list(WORD.finditer(name.lower()))[1:]
+        )
+
+    @staticmethod
+    def scan(keys: list[tuple[str, str]], prefix: str, limit: int):
+        """Yield the names whose key starts with the prefix, in key order."""
+        for key, name in keys[bisect_left(keys, (prefix,)):]:
+            if not key.startswith(prefix) or limit <= 0:
+                break
+            limit -= 1
+            yield name
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Get up to `limit` (rank, name) pairs for a prefix: rank 0 for names that
+        start with it, then rank 1 for names with a later word that does.
+        """
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        found = {name: 0 for name in self.scan(self.names, prefix, limit)}
+        for name in self.scan(self.suffixes, prefix, limit + len(found)):
+            if len(found) >= limit:
+                break
+            found.setdefault(name, 1)
+        return [(rank, name) for name, rank in found.items()]
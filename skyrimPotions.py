@@ -8,14 +8,19 @@ Usage:
     python skyrimPotions.py -i Farmable         # Use all farmable ingredients
     python skyrimPotions.py -s effects          # Sort by number of effects
     python skyrimPotions.py -f ingredients.txt   # Read ingredients from file
+    python skyrimPotions.py -w 8                # Brew with 8 processes
+    python skyrimPotions.py plan "Creep Cluster:14" "Mora Tapinella:9"   # Plan brewing from an inventory
 '''
 
 from potion import Potion
-from ingredient import AllIngredientsByName, get_ingredient_by_name, get_ingredients_by_filter
+from planner import BrewPlan, parse_inventory, plan_brewing
+from ingredient import AllIngredientsByName, get_farmable_ingredients, get_ingredient_by_name
 from rich.console import Console
 from rich.table import Table
 from rich.progress import track
 import argparse
+import os
+import sys
 from enum import Enum
 
 class SortColumn(str, Enum):
@@ -36,16 +41,46 @@ def get_sort_key(sort_by: SortColumn):
     }
     return sort_keys[sort_by]
 
-def print_potions(ingredients, *, sort_by: SortColumn = SortColumn.VALUE, limit: int = 10):
+def print_potions(ingredients, *, sort_by: SortColumn = SortColumn.VALUE, limit: int = 10, vectorized: bool = False,
+                  workers: int = 1):
     """Print a table of potions sorted by the specified column.
     
     Args:
         ingredients: List of ingredients to brew potions from.
         sort_by: Column to sort by (value, effects, or ingredients)
         limit: Maximum number of potions to show. Use -1 to show all potions.
+        vectorized: Use the NumPy brewing engine (faster for large ingredient lists).
+        workers: Number of processes to brew with.  More than 1 brews in parallel.
+
+    Raises ValueError if both vectorized and workers > 1 are asked for (one engine
+    or the other brews).
     """
+    if vectorized and workers > 1:
+        raise ValueError("Pick the vectorized engine or several workers, not both")
     ingredients = list(filter(Potion.is_valid_ingredient, ingredients))
-    potions = Potion.brew(ingredients, track=track)
+    sort_key = get_sort_key(sort_by)
+    # With a limit on value, only the best `top` potions are ever built
+    top = limit if limit != -1 and sort_by == SortColumn.VALUE else None
+    if workers > 1 or vectorized:
+        if workers > 1:
+            # Each worker sends back just its shard's best `top`, merged here
+            potions = Potion.brew_parallel(ingredients, workers=workers, track=track, limit=top)
+        else:
+            potions = Potion.brew_vectorized(ingredients, track=track, limit=top)
+        # Both come back in value order; sort by any other column
+        if sort_by != SortColumn.VALUE:
+            potions = sorted(potions, key=sort_key, reverse=True)
+        if limit != -1:
+            potions = potions[:limit]
+    elif top is not None:
+        # The branch-and-bound search only brews what could make the top N
+        potions = Potion.brew_top(ingredients, limit, track=track)
+    elif limit == -1:
+        # Sort potions by specified column
+        potions = sorted(Potion.brew(ingredients, track=track), key=sort_key, reverse=True)
+    else:
+        # Break ties by value, just like sorting the value-ordered brew would
+        potions = Potion.brew_top(ingredients, limit, key=lambda p: (sort_key(p), p.value), track=track)
     table = Table(
         title=f"Potions (Sorted by {sort_by.value})", 
         show_header=True, 
@@ -62,12 +97,7 @@ def print_potions(ingredients, *, sort_by: SortColumn = SortColumn.VALUE, limit:
     table.add_column("#", justify="right", width=3, no_wrap=True)
     table.add_column("Effects", min_width=40, no_wrap=False)
 
-    # Sort potions by specified column
-    potions = sorted(potions, key=get_sort_key(sort_by), reverse=True)
-    
-    # Show all potions if limit is -1, otherwise show top N
-    potions_to_show = potions if limit == -1 else potions[:limit]
-    for potion in potions_to_show:
+    for potion in potions:
         ingredients = list(potion.ingredients)
         while len(ingredients) < 3:
             ingredients.append(None)
@@ -84,6 +114,40 @@ def print_potions(ingredients, *, sort_by: SortColumn = SortColumn.VALUE, limit:
     console = Console()
     console.print(table)
 
+def print_plan(plan: BrewPlan):
+    """Print a brewing schedule: how many of each potion to brew, and what's left over."""
+    table = Table(
+        title=f"Brewing Plan ({plan.num_potions} potions, {plan.value:.2f} total value)",
+        show_header=True,
+        header_style="bold magenta",
+        padding=(0,1,0,1),
+        show_lines=True
+    )
+    table.add_column("Count", justify="right", width=5, no_wrap=True)
+    table.add_column("Ingredients", min_width=30, no_wrap=False)
+    table.add_column("$ Each", justify="right", width=8, no_wrap=True)
+    table.add_column("$ Total", justify="right", width=9, no_wrap=True)
+    table.add_column("Effects", min_width=40, no_wrap=False)
+
+    for step in plan.steps:
+        table.add_row(
+            str(step.count),
+            ", ".join(ingredient.name for ingredient in step.potion.ingredients),
+            f"{step.potion.value:8.2f}".strip(),
+            f"{step.count * step.potion.value:9.2f}".strip(),
+            ", ".join(effect.name for effect in step.potion.active_effects)
+        )
+
+    console = Console()
+    console.print(table)
+    if plan.leftovers:
+        console.print("Left over: " + ", ".join(f"{name} x{count}" for name, count in plan.leftovers.items()))
+
+def get_inventory_from_file(filepath):
+    """Read an inventory from a file, one "Name:count" entry per line."""
+    with open(filepath, 'r') as f:
+        return parse_inventory([line.strip() for line in f if line.strip()])
+
 def get_ingredients_from_file(filepath):
     """Read ingredients from a file, one per line.
     
@@ -129,7 +193,7 @@ def get_ingredients_from_args(args):
     
     if len(args.ingredients) == 1:
         if args.ingredients[0].lower() == "farmable":
-            return get_ingredients_by_filter(lambda i: i.farmable)
+            return get_farmable_ingredients()
         if args.file:
             return get_ingredients_from_file(args.file)
     
@@ -154,7 +218,9 @@ Examples:
     %(prog)s -i Farmable         # Use all farmable ingredients
     %(prog)s -s effects          # Sort by number of effects
     %(prog)s -f ingredients.txt   # Read ingredients from file
+    %(prog)s -w 8                 # Brew with 8 processes (0 for one per CPU)
     %(prog)s --ingredients "Blue Mountain Flower" "Dragon's Tongue"  # Ingredients with spaces
+    %(prog)s plan "Creep Cluster:14" "Mora Tapinella:9" "Giant's Toe:3"  # Plan brewing from an inventory
         """
     )
     parser.add_argument(
@@ -180,13 +246,48 @@ Examples:
         default=10,
         help='Maximum number of potions to show (default: 10, use -1 to show all)'
     )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help='Number of processes to brew with (default: 1, use 0 for one per CPU)'
+    )
+    commands = parser.add_subparsers(dest='command')
+    plan = commands.add_parser(
+        'plan',
+        help='Plan which potions to brew, and how many, to get the most value from an inventory'
+    )
+    plan.add_argument(
+        'inventory',
+        nargs='*',
+        help='Ingredients on hand, as "Name:count" (a bare name counts as 1)',
+        metavar='NAME:COUNT'
+    )
+    plan.add_argument(
+        '-f', '--file',
+        help='Read the inventory from file (one "Name:count" entry per line)'
+    )
     return parser.parse_args()
 
 if __name__ == '__main__':
     args = parse_args()
+    if args.command == 'plan':
+        try:
+            inventory = get_inventory_from_file(args.file) if args.file else parse_inventory(args.inventory)
+            print_plan(plan_brewing(inventory))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            raise SystemExit(1)
+        raise SystemExit
+
     ingredients = get_ingredients_from_args(args)
     
     if not ingredients:
         print("No valid ingredients specified. Please check ingredient names and try again.")
     else:
-        print_potions(ingredients, sort_by=args.sort, limit=args.limit)
+        workers = args.workers or os.cpu_count() or 1
+        # Listing every potion from every ingredient is what the vectorized engine is
+        # for; a top N is faster with the branch-and-bound search, and -w picks the
+        # parallel engine instead
+        vectorized = not args.ingredients and args.limit == -1 and workers == 1
+        print_potions(ingredients, sort_by=args.sort, limit=args.limit, vectorized=vectorized, workers=workers)
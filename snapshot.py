@@ -0,0 +1,85 @@
+"""
+Compiled snapshots of the data files.  Parsing effects.yaml and ingredients.yaml and
+validating every record through pydantic is most of the cost of importing effect.py
+and ingredient.py, and every worker, CLI run and test process pays it.  A snapshot
+is the validated models pickled next to the YAML file (ingredients.yaml ->
+ingredients.yaml.snapshot), so loading it is a single pickle.load.
+
+A snapshot records a hash of the YAML file it was built from, and it's ignored if
+the file has changed since (or if it can't be read), in which case the YAML is
+parsed as before.  Build (or rebuild) the snapshots, and see the load times, with:
+
+    invoke build-snapshots
+
+Usage:
+    from snapshot import load_snapshot
+    effects = load_snapshot('effects.yaml', Effect)  # None if missing or stale
+"""
+
+import hashlib
+import os
+import pickle
+import time
+
+SNAPSHOT_SUFFIX = '.snapshot'
+MAGIC = b'ALCHSNP1'
+
+
+def get_snapshot_filename(filename: str) -> str:
+    return filename + SNAPSHOT_SUFFIX
+
+
+def get_file_hash(filename: str) -> str:
+    """Hash the contents of a data file."""
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def save_snapshot(filename: str, records: list):
+    """Snapshot the validated records loaded from a data file.  The snapshot is
+    written to a temporary file first, so readers never see a partial one.
+    """
+    snapshot = get_snapshot_filename(filename)
+    temp = f"{snapshot}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as file:
+        pickle.dump((MAGIC, get_file_hash(filename), records), file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, snapshot)
+
+
+def load_snapshot(filename: str, model: type) -> list | None:
+    """Load the snapshot of a data file if it exists, matches the file's current
+    contents and holds `model` records, otherwise return None.
+    """
+    try:
+        with open(get_snapshot_filename(filename), 'rb') as file:
+            magic, data_hash, records = pickle.load(file)
+    except Exception:
+        # Missing, truncated, or pickled by an incompatible version: parse the YAML instead
+        return None
+    if magic != MAGIC or data_hash != get_file_hash(filename):
+        return None
+    if not all(isinstance(record, model) for record in records):
+        return None
+    return records
+
+
+def build_snapshots():
+    """Parse and validate the data files, snapshot them, and print how long loading
+    each one takes from YAML and from its snapshot.
+    """
+    from effect import Effect
+    from ingredient import Ingredient
+    for filename, model in (('effects.yaml', Effect), ('ingredients.yaml', Ingredient)):
+        start = time.perf_counter()
+        records = model.from_file(filename, use_snapshot=False)
+        parsed = time.perf_counter() - start
+        save_snapshot(filename, records)
+        start = time.perf_counter()
+        load_snapshot(filename, model)
+        loaded = time.perf_counter() - start
+        print(f"Wrote {len(records)} records to {get_snapshot_filename(filename)}: "
+              f"YAML {parsed * 1000:.1f} ms, snapshot {loaded * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    build_snapshots()
@@ -10,6 +10,21 @@ def start_debug(c):
     "invoke start-debug"
     c.run('flask run --debugger --reload --extra-files="**/*.html"')
 
+@task
+def build_catalog(c):
+    "invoke build-catalog"
+    c.run('python catalog.py')
+
+@task
+def build_snapshots(c):
+    "invoke build-snapshots"
+    c.run('python snapshot.py')
+
+@task
+def freeze(c):
+    "invoke freeze"
+    c.run('python freeze.py')
+
 @task
 def docker_build(c):
     "invoke docker-build"
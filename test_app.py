@@ -0,0 +1,76 @@
+import json
+from app import app
+from ingredient import AllIngredientsByName
+
+NAMES = ','.join(list(AllIngredientsByName)[:20])
+
+def get(url, **kwargs):
+    return app.test_client().get(url, **kwargs)
+
+def test_stream_matches_json():
+    expected = json.loads(get(f'/api/skyrim/potions?ingredients={NAMES}').data)
+    response = get(f'/api/skyrim/potions?ingredients={NAMES}&stream=1')
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = response.data.decode().splitlines()
+    assert [json.loads(line) for line in lines] == expected['potions']
+    assert int(response.headers['X-Total-Potions']) == expected['total_potions']
+
+def test_stream_by_accept_header_with_paging_and_pricing():
+    headers = {'Accept': 'application/x-ndjson'}
+    response = get(f'/api/skyrim/potions?ingredients={NAMES}&limit=5', headers=headers)
+    assert len(response.data.decode().splitlines()) == 5
+    expected = json.loads(get(f'/api/skyrim/potions?ingredients={NAMES}&limit=5').data)
+    assert response.headers['X-Next-Cursor'] == expected['next']
+    priced = get(f'/api/skyrim/potions?ingredients={NAMES}&limit=5&skill=100', headers=headers)
+    prices = [json.loads(line)['price'] for line in priced.data.decode().splitlines()]
+    assert prices == sorted(prices, reverse=True) and len(prices) == 5
+    # Browsers accept anything, and still get JSON
+    assert get(f'/api/skyrim/potions?ingredients={NAMES}', headers={'Accept': '*/*'}).mimetype != 'application/x-ndjson'
+
+def test_potions_batch():
+    client = app.test_client()
+    body = {'requests': [
+        {'id': 'all', 'ingredients': NAMES.split(',')},
+        {'id': 'top', 'ingredients': NAMES.split(','), 'limit': 3},
+        {'id': 'bad', 'ingredients': ['Not An Ingredient']},
+    ]}
+    results = json.loads(client.post('/api/skyrim/potions/batch', json=body).data)['results']
+    expected = json.loads(get(f'/api/skyrim/potions?ingredients={NAMES}').data)
+    assert results['all']['potions'] == expected['potions']
+    assert results['top']['potions'] == expected['potions'][:3]
+    assert results['top']['total_potions'] == expected['total_potions']
+    assert 'error' in results['bad']
+    assert client.post('/api/skyrim/potions/batch', data='nope').status_code == 400
+
+def test_html_paging_keeps_the_cursor():
+    from html import unescape
+    from urllib.parse import parse_qs, urlparse
+    import re
+    total = json.loads(get(f'/api/skyrim/potions?ingredients={NAMES}').data)['total_potions']
+    url, pages = f'/skyrim/potions?ingredients={NAMES}&limit=40', 0
+    while url:
+        html = unescape(get(url).data.decode())
+        pages += 1
+        links = {label: link for link, text in re.findall(r'<a href="([^"]*)"[^>]*>(.*?)</a>', html, re.S)
+                 for label in ('View More', 'Next Page') if label in text}
+        after = parse_qs(urlparse(url).query).get('after')
+        if 'View More Potions' in html:
+            assert parse_qs(urlparse(links['View More']).query).get('after') == after
+        url = links.get('Next Page')
+        if url is None:
+            # The last page has nothing more to show
+            assert 'View More Potions' not in html and 'Showing' not in html
+    assert pages == -(-total // 40) and pages > 1
+
+def test_html_rejects_limits_below_one():
+    for limit in (0, -1):
+        for ingredients in ('all', NAMES):
+            assert get(f'/skyrim/potions?ingredients={ingredients}&limit={limit}').status_code == 400
+        assert get(f'/skyrim/potions?limit={limit}').status_code == 400
+
+def test_html_view_more_keeps_pricing():
+    from html import unescape
+    html = unescape(get('/skyrim/potions?ingredients=farmable&limit=3&skill=100&alchemist=5').data.decode())
+    link = next(line for line in html.splitlines() if 'limit=103' in line)
+    assert 'skill=100' in link and 'alchemist=5' in link
@@ -0,0 +1,47 @@
+import random
+import pytest
+from batch import BatchBrewer, BatchItem, parse_batch
+from ingredient import AllIngredientsByName
+from potion import Potion
+
+NAMES = list(AllIngredientsByName)
+
+def test_parse_batch():
+    items = parse_batch({'requests': [{'ingredients': ['Wheat']}, {'id': 'b', 'ingredients': [], 'limit': 3, 'sortby': 'efficiency'}]})
+    assert items == [BatchItem('0', ('Wheat',)), BatchItem('b', (), 3, 'efficiency')]
+    for body in (None, [], {'requests': [{'id': 'a'}]}, {'requests': [{'ingredients': [], 'limit': -1}]},
+                 {'requests': [{'ingredients': [], 'limit': True}]},
+                 {'requests': [{'ingredients': [], 'sortby': 'price'}]},
+                 {'requests': [{'id': 'a', 'ingredients': []}, {'id': 'a', 'ingredients': []}]}):
+        with pytest.raises(ValueError):
+            parse_batch(body)
+
+def test_batch_matches_brew():
+    rng = random.Random(25)
+    items = [BatchItem(str(i), tuple(rng.sample(NAMES, rng.randint(0, 12)))) for i in range(20)]
+    results = BatchBrewer(workers=4).run(items)
+    assert list(results) == [item.id for item in items]
+    for item in items:
+        # Sets are brewed in the full table's order, like the catalog
+        expected = Potion.brew(Potion.resolve_ingredients(sorted(item.ingredients, key=NAMES.index)))
+        assert results[item.id]['total_potions'] == len(expected)
+        assert results[item.id]['potions'] == [potion.model_dump() for potion in expected]
+
+def test_batch_dedupes_sorts_and_limits():
+    names = tuple(NAMES[:15])
+    items = [
+        BatchItem('a', names, 5),
+        BatchItem('b', tuple(reversed(names)), 5),
+        BatchItem('c', names, 5, 'efficiency'),
+        BatchItem('d', names + ('Not An Ingredient',)),
+    ]
+    brewer = BatchBrewer(workers=2)
+    results = brewer.run(items)
+    assert results['a'] is results['b'] and len(results['a']['potions']) == 5
+    efficiency = [potion['value'] / potion['cost'] if potion['cost'] else 0.0 for potion in results['c']['potions']]
+    assert efficiency == sorted(efficiency, reverse=True)
+    assert results['c']['total_potions'] == results['a']['total_potions']
+    assert 'Not An Ingredient' in results['d']['error']
+    # Names were resolved once each, and each set brewed into the shared memo
+    assert set(brewer.indexes) == set(names)
+    assert len(brewer.memo) == results['a']['total_potions']
@@ -0,0 +1,29 @@
+import pytest
+from bounds import BoundTable, best_rows
+from brewing import BrewTable, row_order
+from ingredient import AllIngredientsByName, get_farmable_ingredients
+from potion import Potion
+
+@pytest.fixture(scope="module")
+def table():
+    return BrewTable(Potion.resolve_ingredients(list(AllIngredientsByName.values())))
+
+@pytest.mark.parametrize("limit", [0, 1, 10, 250])
+def test_matches_brew_order(table, limit):
+    assert best_rows(table, limit) == sorted(table.rows(), key=row_order)[:limit]
+
+def test_limit_past_end():
+    table = BrewTable(get_farmable_ingredients())
+    rows = sorted(table.rows(), key=row_order)
+    assert best_rows(table, len(rows) + 10) == rows
+
+def test_bounds_hold(table):
+    bounds = BoundTable(table)
+    for row in table.rows():
+        assert row.value <= bounds.first(row.combo[0])
+        if len(row.combo) == 3:
+            a, b, c = row.combo
+            if (a, b) in bounds.p:
+                assert row.value <= bounds.sharing(a, b) * (1 + 1e-9)
+            else:
+                assert row.value <= bounds.bridged(a, c) * (1 + 1e-9)
@@ -0,0 +1,51 @@
+import pytest
+from brew_cache import APPROX_INGREDIENT_BYTES, APPROX_PAIR_BYTES, APPROX_ROW_BYTES, BrewCache
+from ingredient import AllIngredientsByName
+from potion import Potion
+
+def test_hit_ignores_order_and_duplicates():
+    cache = BrewCache()
+    first = cache.brew(["Wheat", "Blue Mountain Flower", "Hagraven Feathers"])
+    second = cache.brew(["Hagraven Feathers", "Wheat", "Blue Mountain Flower", "Wheat"])
+    assert second is first
+    assert cache.stats() == {'entries': 1, 'bytes': cache.size, 'hits': 1, 'misses': 1, 'evictions': 0}
+    assert [p.ingredients_key() for p in first] == [p.ingredients_key() for p in Potion.brew(
+        ["Blue Mountain Flower", "Hagraven Feathers", "Wheat"])]
+
+def test_evicts_least_recently_used():
+    cache = BrewCache(max_entries=2)
+    cache.brew(["Wheat", "Blue Mountain Flower"])
+    cache.brew(["Wheat", "Giant's Toe"])
+    cache.brew(["Wheat", "Blue Mountain Flower"])
+    cache.brew(["Nirnroot", "Deathbell"])
+    assert cache.evictions == 1
+    assert frozenset(["Wheat", "Giant's Toe"]) not in cache.entries
+    assert frozenset(["Wheat", "Blue Mountain Flower"]) in cache.entries
+
+def test_evicts_by_size():
+    ingredients = list(AllIngredientsByName.values())[:20]
+    cache = BrewCache(max_bytes=BrewCache.approximate_size(Potion.brew_lazy(ingredients)))
+    cache.brew(ingredients)
+    cache.brew(["Wheat", "Blue Mountain Flower"])
+    assert cache.evictions == 1
+    assert len(cache) == 1
+    assert cache.size <= cache.max_bytes
+
+def test_size_counts_the_table():
+    potions = Potion.brew_lazy(list(AllIngredientsByName.values())[:20])
+    table_size = BrewCache.approximate_size(potions) - len(potions) * APPROX_ROW_BYTES
+    assert table_size == len(potions.table) * APPROX_INGREDIENT_BYTES + len(potions.table.pair_table) * APPROX_PAIR_BYTES
+    assert table_size > 0
+
+def test_reloaded_ingredients_miss():
+    cache = BrewCache()
+    cache.brew(["Wheat", "Blue Mountain Flower"])
+    reloaded = AllIngredientsByName["Wheat"].model_copy()
+    cache.brew([reloaded, "Blue Mountain Flower"])
+    assert cache.misses == 2
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+def test_error_handling():
+    with pytest.raises(ValueError):
+        BrewCache().brew(["NonexistentIngredient"])
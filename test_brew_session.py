@@ -0,0 +1,52 @@
+import random
+import pytest
+from brew_session import BrewSession, BrewSessions
+from ingredient import AllIngredientsByName
+from potion import Potion
+
+def brewed(potions):
+    return sorted((potion.ingredients_key(), round(potion.value, 6)) for potion in potions)
+
+def test_matches_brew_as_ingredients_change():
+    rng = random.Random(7)
+    names = list(AllIngredientsByName)
+    session = BrewSession()
+    selection = []
+    for _ in range(40):
+        if selection and rng.random() < 0.3:
+            name = rng.choice(selection)
+            selection.remove(name)
+            session.remove(name)
+        else:
+            name = rng.choice(names)
+            if name not in selection:
+                selection.append(name)
+            session.add(name)
+        potions = session.potions()
+        assert brewed(potions) == brewed(Potion.brew(selection))
+        values = [potion.value for potion in potions]
+        assert values == sorted(values, reverse=True)
+
+def test_add_and_remove_counts():
+    session = BrewSession(["Wheat", "Garlic"])
+    assert len(session) == 0
+    assert session.add("Blue Mountain Flower") == 1
+    assert session.add("Blue Mountain Flower") == 0
+    assert session.add("Jarrin Root") == 0
+    assert [ingredient.name for ingredient in session.ingredients] == ["Wheat", "Garlic", "Blue Mountain Flower"]
+    assert session.remove("Garlic") == 0
+    assert session.remove("Wheat") == 1
+    assert len(session) == 0
+    with pytest.raises(ValueError):
+        session.add("Not An Ingredient")
+
+def test_sessions_by_token():
+    sessions = BrewSessions(max_entries=2)
+    first, session = sessions.create(["Wheat", "Blue Mountain Flower"])
+    assert sessions.get(first) is session
+    second, _ = sessions.create()
+    sessions.get(first)
+    sessions.create()
+    assert sessions.get(second) is None
+    assert sessions.get(first) is session
+    assert sessions.get("unknown") is None
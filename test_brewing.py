@@ -0,0 +1,71 @@
+import pytest
+from brewing import BrewTable, get_effect_bit, get_effect_mask, iter_bits
+from effect import Effect
+from ingredient import Ingredient, get_ingredient_by_name
+from potion import combinations
+
+combine_test_cases = [
+    # ingredient_names
+    ["Wheat", "Blue Mountain Flower"],
+    ["Wheat", "Blue Mountain Flower", "Hagraven Feathers"],
+    ["Nirnroot", "Deathbell", "Emperor Parasol Moss"],
+    ["Creep Cluster", "Mora Tapinella", "Scaly Pholiota"],
+    ["Wheat", "Hagraven Feathers"],
+]
+
+@pytest.mark.parametrize("ingredient_names", combine_test_cases)
+def test_matches_ingredient_combine(ingredient_names):
+    ingredients = [get_ingredient_by_name(name) for name in ingredient_names]
+    table = BrewTable(ingredients)
+    for combo in combinations(range(len(ingredients))):
+        expected = Ingredient.combine([ingredients[index] for index in combo])
+        mask = table.shared_mask(combo)
+        assert bool(mask) == bool(expected)
+        assert table.active_effects(combo, mask) == expected
+        assert table.value(combo, mask) == Effect.get_value(expected)
+
+def test_effect_masks():
+    bits = [get_effect_bit("Restore Health"), get_effect_bit("Fortify Health")]
+    mask = get_effect_mask(["Restore Health", "Fortify Health"])
+    assert mask.bit_count() == 2
+    assert list(iter_bits(mask)) == sorted(bits)
+
+def test_unknown_effect_gets_a_bit():
+    bit = get_effect_bit("Test Effect Not In Effects File")
+    assert get_effect_bit("Test Effect Not In Effects File") == bit
+    assert bit not in {get_effect_bit("Restore Health"), get_effect_bit("Fortify Health")}
+
+def test_cost():
+    table = BrewTable([get_ingredient_by_name("Wheat"), get_ingredient_by_name("Blue Mountain Flower")])
+    assert table.cost((0, 1)) == sum(ingredient.value for ingredient in table.ingredients)
+
+def test_potion_combos_match_brute_force():
+    ingredients = [get_ingredient_by_name(name) for name in
+                   ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe", "Wheat", "Honeycomb"]]
+    table = BrewTable(ingredients)
+    expected = []
+    for combo in combinations(range(len(ingredients))):
+        mask = table.shared_mask(combo)
+        if mask and all(table.masks[index] & mask for index in combo):
+            expected.append((combo, mask))
+    assert list(table.potion_combos()) == expected
+
+def test_neighbors():
+    table = BrewTable([get_ingredient_by_name(name) for name in ["Wheat", "Blue Mountain Flower", "Honeycomb"]])
+    assert list(iter_bits(table.neighbors[0])) == [1]
+    assert table.neighbors[2] == 0
+    assert list(table.pairs()) == [((0, 1), table.masks[0] & table.masks[1])]
+
+def test_pair_table():
+    ingredients = [get_ingredient_by_name(name) for name in ["Nirnroot", "Deathbell", "River Betty", "Wheat"]]
+    table = BrewTable(ingredients)
+    for combo in combinations(range(len(ingredients))):
+        expected = Ingredient.combine([ingredients[index] for index in combo])
+        if len(combo) == 2:
+            assert (combo in table.pair_table) == bool(expected)
+        if expected:
+            mask = table.shared_mask(combo)
+            assert [table.products(combo, bit) for bit in iter_bits(mask)] == \
+                   [(effect.power, effect.value) for effect in sorted(expected, key=lambda e: get_effect_bit(e.name))]
+    pair = table.pair_table[(0, 1)]
+    assert pair.value == Effect.get_value(Ingredient.combine(ingredients[:2]))
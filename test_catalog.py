@@ -0,0 +1,74 @@
+import pytest
+from catalog import Catalog, get_data_hash
+from ingredient import AllIngredientsByName
+from paging import Cursor, page_potions
+from potion import Potion
+
+@pytest.fixture(scope="module")
+def catalog():
+    return Catalog.build()
+
+def test_build_matches_brew(catalog):
+    potions = Potion.brew(list(AllIngredientsByName.values()))
+    assert len(catalog) == len(potions)
+    assert [p.ingredients_key() for p in catalog.potions()[:50]] == [p.ingredients_key() for p in potions[:50]]
+    assert list(catalog.values[:50]) == [p.value for p in potions[:50]]
+
+def test_save_and_load(catalog, tmp_path):
+    filename = str(tmp_path / "potions.catalog")
+    catalog.save(filename)
+    loaded = Catalog.open(filename)
+    assert loaded is not None
+    assert loaded.data_hash == get_data_hash()
+    assert loaded.ingredient_names == catalog.ingredient_names
+    assert (loaded.ingredients == catalog.ingredients).all()
+    assert (loaded.effects == catalog.effects).all()
+    assert (loaded.values == catalog.values).all()
+    assert (loaded.costs == catalog.costs).all()
+    assert loaded.potions()[0] == catalog.potions()[0]
+    assert loaded.effect_mask(0) == catalog.effect_mask(0)
+
+def test_stale_or_missing_catalog(catalog, tmp_path):
+    assert Catalog.open(str(tmp_path / "missing.catalog")) is None
+    filename = str(tmp_path / "stale.catalog")
+    catalog.data_hash = "not the current data"
+    try:
+        catalog.save(filename)
+    finally:
+        catalog.data_hash = get_data_hash()
+    assert Catalog.open(filename) is None
+
+def test_not_a_catalog(tmp_path):
+    filename = tmp_path / "bogus.catalog"
+    filename.write_bytes(b"this is not a catalog")
+    with pytest.raises(ValueError):
+        Catalog.load(str(filename))
+
+select_test_cases = [
+    # ingredient_names
+    ["Wheat", "Blue Mountain Flower"],
+    ["Wheat", "Blue Mountain Flower", "Hagraven Feathers", "Honeycomb"],
+    ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe"],
+    ["Wheat"],
+    [],
+]
+
+@pytest.mark.parametrize("ingredient_names", select_test_cases)
+def test_select_matches_brew(catalog, ingredient_names):
+    selection = catalog.select(ingredient_names)
+    potions = Potion.brew(ingredient_names)
+    assert sorted(p.ingredients_key() for p in selection) == sorted(p.ingredients_key() for p in potions)
+    assert [p.value for p in selection] == [p.value for p in potions]
+    assert [p.ingredients_key() for p in selection[:1]] == [p.ingredients_key() for p in potions[:1]]
+
+def test_covers(catalog):
+    assert catalog.covers(["Wheat", "Jarrin Root"])
+    assert not catalog.covers(["Wheat", "NOT AN INGREDIENT"])
+    custom = AllIngredientsByName["Wheat"].model_copy(update={"value": 1000})
+    assert not catalog.covers([custom])
+
+def test_pages_resume_after_cursor(catalog):
+    selection = catalog.potions()
+    first, cursor = page_potions(selection, 1000)
+    second, _ = page_potions(selection, 1000, Cursor.parse(str(cursor)))
+    assert [p.ingredients_key() for p in list(first) + list(second)] == [p.ingredients_key() for p in selection[:2000]]
@@ -0,0 +1,46 @@
+import gzip
+import app as app_module
+from freeze import FrozenSite, freeze, get_page_filename, get_page_url
+
+def test_page_filenames():
+    assert get_page_filename('/') == 'index.html'
+    assert get_page_filename("/skyrim/ingredients/Giant's Toe") == "skyrim/ingredients/Giant's Toe/index.html"
+    url = get_page_url('/skyrim/potions', {'limit': 100, 'ingredients': 'all'})
+    assert url == '/skyrim/potions?ingredients=all&limit=100'
+    assert get_page_filename(url) == 'skyrim/potions/ingredients=all&limit=100.html'
+
+def test_freeze_is_incremental(tmp_path):
+    rendered, unchanged = freeze(str(tmp_path), workers=1)
+    assert rendered > 100 and unchanged == 0
+    assert freeze(str(tmp_path), workers=1) == (0, rendered)
+    (tmp_path / get_page_filename('/skyrim/ingredients/Wheat')).unlink()
+    assert freeze(str(tmp_path), workers=1) == (1, rendered - 1)
+
+def test_serves_frozen_pages(tmp_path, monkeypatch):
+    freeze(str(tmp_path), workers=1)
+    site = FrozenSite.open(str(tmp_path))
+    assert site is not None
+    monkeypatch.setattr(app_module, 'frozen_site', site)
+    client = app_module.app.test_client()
+    expected = (tmp_path / 'skyrim/ingredients/Wheat/index.html').read_bytes()
+    response = client.get('/skyrim/ingredients/Wheat', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == expected
+    etag = response.headers['ETag']
+    response.close()
+    assert client.get('/skyrim/ingredients/Wheat', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+    assert client.get('/skyrim/potions?limit=100&ingredients=best').headers['ETag'] != etag
+    # Pages that weren't frozen are rendered as usual
+    assert 'Content-Encoding' not in client.get('/skyrim/effects?sortby=cost').headers
+    assert FrozenSite.open(str(tmp_path / 'missing')) is None
+
+def test_code_changes_invalidate_the_site(tmp_path, monkeypatch):
+    import freeze as freeze_module
+    files = freeze_module.get_code_files()
+    assert {'app.py', 'potion.py', 'brewing.py', 'listing.py', 'catalog.py'} <= set(files)
+    assert not any(name.startswith('test_') for name in files)
+    freeze(str(tmp_path), workers=1)
+    assert FrozenSite.open(str(tmp_path)) is not None
+    monkeypatch.setattr(freeze_module, 'get_code_hash', lambda: 'changed')
+    assert FrozenSite.open(str(tmp_path)) is None
+    assert freeze(str(tmp_path), workers=1)[1] == 0
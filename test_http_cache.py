@@ -0,0 +1,59 @@
+import gzip
+from flask import Flask, request
+from http_cache import MIN_COMPRESS_BYTES, ResponseCache
+
+def make_app(version=lambda: 1):
+    app = Flask(__name__)
+    cache = ResponseCache(version=lambda: version())
+    calls = []
+
+    @app.route("/page")
+    @cache.cached(when=lambda: request.args.get('random') is None)
+    def page():
+        calls.append(dict(request.args))
+        return "x" * MIN_COMPRESS_BYTES + request.args.get('q', '')
+
+    @app.route("/missing")
+    @cache.cached()
+    def missing():
+        calls.append({})
+        return "Not Found", 404
+
+    return app.test_client(), cache, calls
+
+def test_cached_by_normalized_args():
+    client, cache, calls = make_app()
+    first = client.get("/page?q=a&sort=b")
+    second = client.get("/page?sort=b&q=a")
+    assert first.data == second.data
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Cache-Control'].startswith('public')
+    assert len(calls) == 1
+    client.get("/page?q=b")
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
+
+def test_not_modified_and_gzip():
+    client, _, _ = make_app()
+    plain = client.get("/page?q=a")
+    assert client.get("/page?q=a", headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+    zipped = client.get("/page?q=a", headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert client.get("/page?q=a", headers={'Accept-Encoding': 'gzip', 'If-None-Match': zipped.headers['ETag']}).status_code == 304
+    assert client.get("/page?q=a", headers={'If-None-Match': zipped.headers['ETag']}).status_code == 200
+
+def test_data_version_errors_and_skipped_requests():
+    version = [1]
+    client, _, calls = make_app(lambda: version[0])
+    client.get("/page")
+    version[0] = 2
+    client.get("/page")
+    assert len(calls) == 2
+    client.get("/page?random=1")
+    client.get("/page?random=1")
+    assert len(calls) == 4
+    client.get("/missing")
+    assert client.get("/missing").status_code == 404
+    assert len(calls) == 6
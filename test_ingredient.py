@@ -195,3 +195,31 @@ def test_category_helper_functions():
         # Should include multiple subcategories
         subcategories = set(i.category for i in flora_ingredients)
         assert len(subcategories) > 1
+
+def test_inverted_indexes():
+    from ingredient import AllIngredientsByName, get_farmable_ingredients, get_ingredients_with_effect
+    assert get_ingredients_with_effect("Fortify Health") == \
+        get_ingredients_by_filter(lambda i: i.has_effect("Fortify Health"))
+    assert get_ingredients_with_effect("Not An Effect") == []
+    assert get_farmable_ingredients() == get_ingredients_by_filter(lambda i: i.farmable)
+    assert get_farmable_ingredients(False) == get_ingredients_by_filter(lambda i: not i.farmable)
+    assert get_ingredients_by_category("Flora/") == \
+        get_ingredients_by_filter(lambda i: i.category and i.category.startswith("Flora/"))
+    assert get_ingredients_by_category("Flora/Plants", exact_match=True) == \
+        get_ingredients_by_filter(lambda i: i.category == "Flora/Plants")
+    assert len(get_ingredients_by_category("")) == len(AllIngredientsByName)
+
+def test_load_ingredients_rebuilds_indexes(tmp_path):
+    import json
+    from ingredient import AllIngredientsByName, load_ingredients, get_ingredients_with_effect
+    wheat = get_ingredient_by_name("Wheat")
+    filename = tmp_path / "ingredients.json"
+    filename.write_text(json.dumps([wheat.model_dump()]))
+    try:
+        load_ingredients(str(filename))
+        assert list(AllIngredientsByName) == ["Wheat"]
+        assert [i.name for i in get_ingredients_with_effect("Fortify Health")] == ["Wheat"]
+        assert get_all_categories() == {wheat.category}
+    finally:
+        load_ingredients()
+    assert len(AllIngredientsByName) > 1
@@ -0,0 +1,40 @@
+from operator import itemgetter
+from listing import Listing
+from ingredient import AllIngredientsByName, IngredientListing, IngredientSortKeys
+
+RECORDS = [
+    {'name': 'a', 'value': 2, 'kind': 'x'},
+    {'name': 'b', 'value': 1, 'kind': 'y'},
+    {'name': 'c', 'value': 2, 'kind': 'x/z'},
+    {'name': 'd', 'value': 1, 'kind': 'x'},
+]
+
+def names(records):
+    return [record['name'] for record in records]
+
+def make_listing():
+    return Listing(RECORDS, {'name': itemgetter('name'), 'value': itemgetter('value')}, {'kind': itemgetter('kind')})
+
+def test_descending_matches_stable_reverse_sort():
+    listing = make_listing()
+    assert names(listing.select(sortby='value')) == names(sorted(RECORDS, key=itemgetter('value')))
+    assert names(listing.select(sortby='value', reverse=True)) == names(sorted(RECORDS, key=itemgetter('value'), reverse=True))
+    assert names(listing.select(sortby='value', reverse=True)) == ['a', 'c', 'b', 'd']
+
+def test_filters_and_search():
+    listing = make_listing()
+    assert names(listing.select(listing.match('kind', 'x'), 'name')) == ['a', 'd']
+    assert listing.match('kind', 'missing') == 0
+    prefixed = listing.match_any('kind', lambda kind: kind.startswith('x'))
+    assert names(listing.select(prefixed, 'name', reverse=True)) == ['d', 'c', 'a']
+    assert names(listing.select(prefixed, 'name', predicate=lambda record: record['value'] == 2)) == ['a', 'c']
+
+def test_ingredient_listing_matches_sort():
+    listing = IngredientListing.data
+    assert len(listing) == len(AllIngredientsByName)
+    for sortby, key in IngredientSortKeys.items():
+        for reverse in (False, True):
+            expected = sorted(AllIngredientsByName.values(), key=key, reverse=reverse)
+            assert [i.name for i in listing.select(sortby=sortby, reverse=reverse)] == [i.name for i in expected]
+    farmable = listing.select(listing.match('farmable', True), 'name')
+    assert farmable == sorted((i for i in AllIngredientsByName.values() if i.farmable), key=lambda i: i.name)
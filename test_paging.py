@@ -0,0 +1,37 @@
+import pytest
+from ingredient import AllIngredientsByName
+from paging import Cursor, page_potions
+from potion import Potion
+
+NAMES = list(AllIngredientsByName)[:25]
+
+def test_cursor_round_trip():
+    cursor = Cursor(21.16, ("Canis Root", "Deathbell", "Nirnroot"))
+    assert str(cursor) == "21.16,Canis Root,Deathbell,Nirnroot"
+    assert Cursor.parse(str(cursor)) == cursor
+    with pytest.raises(ValueError):
+        Cursor.parse("abc,Wheat")
+
+def test_pages_cover_brew_order():
+    potions = Potion.brew_lazy(NAMES)
+    seen, after = [], None
+    while True:
+        page, after = page_potions(potions, 37, after)
+        seen += [potion.ingredients_key() for potion in page]
+        if after is None:
+            break
+    assert seen == [potion.ingredients_key() for potion in potions]
+    page, after = page_potions(potions, 10, Cursor.of(potions[len(potions) - 1]))
+    assert len(page) == 0 and after is None
+
+def test_brew_top_after_cursor():
+    potions = Potion.brew(NAMES)
+    after = Cursor.of(potions[99])
+    assert [p.ingredients_key() for p in Potion.brew_top(NAMES, 50, after=after)] == \
+        [p.ingredients_key() for p in potions[100:150]]
+
+def test_unknown_cursor_skips_equal_values():
+    potions = Potion.brew_lazy(NAMES)
+    value = potions[10].value
+    page, _ = page_potions(potions, 5, Cursor(value, ("Not", "Here")))
+    assert all(potion.value < value for potion in page)
@@ -0,0 +1,30 @@
+import pytest
+from brewing import BrewTable, row_order
+from ingredient import AllIngredientsByName
+from parallel import brew_rows_parallel
+from potion import Potion
+
+def potion_rows(potions):
+    return [(potion.ingredients_key(), potion.active_effects, potion.value, potion.cost) for potion in potions]
+
+@pytest.fixture(scope="module")
+def ingredients():
+    return Potion.resolve_ingredients(list(AllIngredientsByName.values())[:40])
+
+def test_matches_brew(ingredients):
+    assert potion_rows(Potion.brew_parallel(ingredients, workers=2)) == potion_rows(Potion.brew(ingredients))
+
+def test_limit(ingredients):
+    assert potion_rows(Potion.brew_parallel(ingredients, workers=2, limit=25)) == potion_rows(Potion.brew(ingredients)[:25])
+
+def test_rows_in_brew_order(ingredients):
+    rows = brew_rows_parallel(ingredients, workers=2)
+    assert rows == sorted(BrewTable(ingredients).rows(), key=row_order)
+
+def test_track_per_shard(ingredients):
+    calls = []
+    def track(items, total=None, description=None):
+        calls.append(total)
+        return items
+    brew_rows_parallel(ingredients, workers=2, track=track)
+    assert calls == [8]
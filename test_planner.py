@@ -0,0 +1,48 @@
+import pytest
+from planner import Planner, parse_inventory, plan_brewing, resolve_inventory
+from ingredient import AllIngredientsByName, get_ingredient_by_name
+
+def used(plan):
+    totals = {}
+    for step in plan.steps:
+        for ingredient in step.potion.ingredients:
+            totals[ingredient.name] = totals.get(ingredient.name, 0) + step.count
+    return totals
+
+def test_plan_respects_inventory():
+    inventory = {"Creep Cluster": 14, "Mora Tapinella": 9, "Giant's Toe": 3, "Wheat": 5}
+    plan = plan_brewing(inventory)
+    totals = used(plan)
+    for name, count in inventory.items():
+        assert totals.get(name, 0) + plan.leftovers.get(name, 0) == count
+    assert plan.value == pytest.approx(sum(step.count * step.potion.value for step in plan.steps))
+    assert plan.value == pytest.approx(34.7)
+
+def test_plan_beats_greedy():
+    inventory = {"Fire Salts": 3, "Ectoplasm": 1, "Giant Lichen": 2, "Beehive Husk": 3, "Jazbay Grapes": 2, "Spider Egg": 3}
+    planner = Planner(inventory)
+    _, _, greedy_value = planner.greedy(list(range(len(planner.rows))))
+    assert greedy_value == pytest.approx(7.0)
+    assert plan_brewing(inventory).value == pytest.approx(8.0)
+
+def test_plan_full_inventory():
+    inventory = {name: 5 for name in AllIngredientsByName}
+    plan = plan_brewing(inventory)
+    assert all(count <= 5 for count in used(plan).values())
+    assert plan.num_potions > 0
+
+def test_resolve_inventory():
+    wheat = get_ingredient_by_name("Wheat")
+    assert resolve_inventory({"Wheat": 2, wheat: 1, "Garlic": 0}) == {wheat: 3}
+    with pytest.raises(ValueError):
+        resolve_inventory({"NOT AN INGREDIENT": 1})
+    with pytest.raises(ValueError):
+        resolve_inventory({"Wheat": -1})
+    assert plan_brewing({}).steps == []
+
+def test_parse_inventory():
+    assert parse_inventory(["Creep Cluster:14", " Wheat : 2", "Wheat", "Giant's Toe"]) == {
+        "Creep Cluster": 14, "Wheat": 3, "Giant's Toe": 1
+    }
+    with pytest.raises(ValueError):
+        parse_inventory(["Wheat:lots"])
@@ -1,6 +1,7 @@
 import pytest
-from potion import Potion, combinations
+from potion import Potion, combinations, get_full_table
 from ingredient import get_ingredient_by_name
+from paging import Cursor
 
 brew_test_cases = [
     # ingredient_names, potion_names
@@ -13,6 +14,9 @@ brew_test_cases = [
         "Potion of Fortify Conjuration and Fortify Health and Restore Health"
         ]),
     (["Wheat", "Giant's Toe"], ["Potion of Damage Stamina Regen and Fortify Health"]),
+    (["Wheat", "Blue Mountain Flower", "Honeycomb"], [
+        "Potion of Fortify Health and Restore Health"
+        ]),
     (["Wheat", "NOT AN INGREDIENT"], None),
 ]
 
@@ -139,3 +143,88 @@ def test_error_handling():
     # Test with None value
     with pytest.raises(TypeError):
         Potion.brew(None)  # None is not a list
+
+def test_every_ingredient_contributes():
+    # A third ingredient that adds no active effect doesn't make a new potion
+    potions = Potion.brew(["Wheat", "Blue Mountain Flower", "Honeycomb"])
+    assert [potion.ingredients_key() for potion in potions] == ["Blue Mountain Flower,Wheat"]
+    for potion in Potion.brew(["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe"]):
+        active = {effect.name for effect in potion.active_effects}
+        assert all(any(effect.name in active for effect in ingredient.effects) for ingredient in potion.ingredients)
+
+def test_iter_brew():
+    ingredients = ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe"]
+    potions = Potion.iter_brew(ingredients)
+    assert not isinstance(potions, list)
+    assert sorted(potions, key=lambda potion: potion.value, reverse=True) == Potion.brew(ingredients)
+    with pytest.raises(ValueError):
+        Potion.iter_brew(["NonexistentIngredient"])
+
+@pytest.mark.parametrize("limit", [0, 1, 5, 1000])
+def test_brew_top(limit):
+    ingredients = ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe", "Wheat"]
+    expected = Potion.brew(ingredients)[:limit]
+    assert [p.ingredients_key() for p in Potion.brew_top(ingredients, limit)] == [p.ingredients_key() for p in expected]
+    assert Potion.count_potions(ingredients) == len(Potion.brew(ingredients))
+
+def test_brew_top_with_key():
+    ingredients = ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe", "Wheat"]
+    key = lambda potion: len(potion.active_effects)
+    expected = sorted(Potion.brew(ingredients), key=key, reverse=True)[:4]
+    actual = Potion.brew_top(ingredients, 4, key=lambda potion: (key(potion), potion.value))
+    assert [p.ingredients_key() for p in actual] == [p.ingredients_key() for p in expected]
+    with pytest.raises(ValueError):
+        Potion.brew_top(ingredients, 4, key=key, after=Cursor.of(expected[0]))
+
+def test_brew_top_tracks_progress():
+    ingredients = ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe", "Wheat"]
+    progress = []
+    def track(items, total, description):
+        for item in items:
+            progress.append((item, total))
+            yield item
+    Potion.brew_top(ingredients, 3, track=track)
+    assert progress and all(total == len(ingredients) for _, total in progress)
+
+def test_brew_lazy():
+    ingredients = ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe"]
+    potions = Potion.brew_lazy(ingredients)
+    expected = Potion.brew(ingredients)
+    assert len(potions) == len(expected)
+    assert list(potions) == expected
+    assert potions[0].model_dump() == expected[0].model_dump()
+    assert [p.ingredients_key() for p in potions[1:3]] == [p.ingredients_key() for p in expected[1:3]]
+    row = potions.rows[0]
+    assert (row.value, row.cost, row.num_effects) == (expected[0].value, expected[0].cost, len(expected[0].active_effects))
+
+def test_find_recipes():
+    effects = ["Fortify Smithing", "Fortify Enchanting"]
+    names = [ingredient.name for ingredient in get_full_table().ingredients]
+    expected = {
+        potion.ingredients_key() for potion in Potion.brew(names)
+        if set(effects) <= {effect.name for effect in potion.active_effects}
+    }
+    recipes = Potion.find_recipes(effects)
+    assert {potion.ingredients_key() for potion in recipes} == expected
+    assert [potion.value for potion in recipes] == sorted((potion.value for potion in recipes), reverse=True)
+    by_efficiency = Potion.find_recipes(effects, sort_by="efficiency", limit=3)
+    assert len(by_efficiency) == 3
+    assert by_efficiency[0].efficiency == max(potion.efficiency for potion in recipes)
+
+@pytest.mark.parametrize("effects", [["Restore Health"], ["Paralysis"], ["Damage Health", "Fortify Health"]])
+@pytest.mark.parametrize("sort_by", ["value", "efficiency"])
+def test_find_recipes_limit_matches_full_sort(effects, sort_by):
+    # The value bounds skip triples, but never one of the best
+    everything = Potion.find_recipes(effects, sort_by=sort_by)
+    for limit in (1, 10, 50):
+        assert Potion.find_recipes(effects, sort_by=sort_by, limit=limit) == everything[:limit]
+
+def test_find_recipes_constraints():
+    for potion in Potion.find_recipes(["Restore Health"], farmable=True, exclude=["Wheat"], max_cost=10):
+        assert all(ingredient.farmable for ingredient in potion.ingredients)
+        assert "Wheat" not in potion.ingredients_key()
+        assert potion.cost <= 10
+    with pytest.raises(ValueError):
+        Potion.find_recipes(["NOT AN EFFECT"])
+    with pytest.raises(ValueError):
+        Potion.find_recipes(["Restore Health"], sort_by="nonsense")
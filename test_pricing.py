@@ -0,0 +1,53 @@
+import math
+import pytest
+from effect import AllEffectsByName
+from ingredient import AllIngredientsByName
+from potion import Potion
+from pricing import Pricing, PriceTable
+
+def reference_price(potion, pricing):
+    total = 0
+    for active in potion.active_effects:
+        effect = AllEffectsByName.get(active.name)
+        if effect is None:
+            continue
+        factor = pricing.base_factor * active.power
+        if pricing.physician and active.name.startswith("Restore "):
+            factor *= 1.25
+        if effect.type == "Offensive" and pricing.poisoner or effect.type != "Offensive" and pricing.benefactor:
+            factor *= 1.25
+        mag, dur = (round(effect.mag * factor), effect.dur) if effect.mag > 0 else (0, round(effect.dur * factor))
+        price = effect.cost * active.value
+        if mag > 0:
+            price *= mag ** 1.1
+        if dur > 0:
+            price *= dur ** 1.1 * 0.0794328
+        total += math.floor(price)
+    return total
+
+pricing_cases = [
+    Pricing(),
+    Pricing(skill=100, alchemist=5, physician=True, benefactor=True, fortify_alchemy=25),
+    Pricing(skill=50, alchemist=2, poisoner=True),
+]
+
+@pytest.mark.parametrize("pricing", pricing_cases)
+def test_matches_reference(pricing):
+    potions = Potion.brew_lazy(list(AllIngredientsByName.values())[:25])
+    prices = PriceTable(potions.table).price_potions(potions, pricing)
+    assert list(prices) == [reference_price(potion, pricing) for potion in potions]
+
+def test_higher_skill_pays_more():
+    potions = Potion.brew_lazy(["Wheat", "Blue Mountain Flower", "Giant's Toe", "Hagraven Feathers"])
+    table = PriceTable(potions.table)
+    novice = table.price_potions(potions, Pricing(skill=15))
+    master = table.price_potions(potions, Pricing(skill=100, alchemist=5))
+    assert (master >= novice).all() and (master > novice).any()
+
+def test_validate():
+    with pytest.raises(ValueError):
+        Pricing(skill=101).validate()
+    with pytest.raises(ValueError):
+        Pricing(alchemist=6).validate()
+    with pytest.raises(ValueError):
+        Pricing(fortify_alchemy=-1).validate()
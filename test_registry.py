@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+import pytest
+from ingredient import Ingredient, IngredientRegistries, get_ingredient_by_name, index_by_effect
+from registry import Registries, Registry, RegistryIndex
+
+@pytest.fixture
+def wheat_file(tmp_path):
+    filename = tmp_path / "ingredients.json"
+    filename.write_text(json.dumps([get_ingredient_by_name("Wheat").model_dump()]))
+    return str(filename)
+
+def test_loads_on_first_access(wheat_file):
+    calls = []
+    def load_records(filename):
+        calls.append(filename)
+        return Ingredient.from_file(filename)
+    registry = Registry(load_records, wheat_file)
+    assert not registry.loaded and calls == []
+    assert list(registry) == ["Wheat"]
+    assert registry["Wheat"].name == "Wheat"
+    assert registry.get("Garlic") is None
+    assert calls == [wheat_file]
+
+def test_index_rebuilt_on_load(wheat_file):
+    registry = Registry(Ingredient.from_file, 'ingredients.yaml')
+    by_effect = RegistryIndex(registry, index_by_effect)
+    assert len(by_effect["Restore Health"]) > 1
+    registry.load(wheat_file)
+    assert [ingredient.name for ingredient in by_effect["Restore Health"]] == ["Wheat"]
+    registry.load()
+    assert len(by_effect["Restore Health"]) > 1
+
+def test_named_datasets(wheat_file):
+    registries = Registries(Ingredient.from_file, 'ingredients.yaml')
+    wheat_only = registries.add("wheat", wheat_file)
+    assert not wheat_only.loaded
+    assert list(registries["wheat"]) == ["Wheat"]
+    assert len(registries.default) > 1
+    with pytest.raises(ValueError):
+        registries["missing"]
+    with pytest.raises(ValueError):
+        registries.load("missing")
+    assert "wheat" not in IngredientRegistries
+
+def test_import_does_not_load_data():
+    code = (
+        "import app, potion, skyrimPotions\n"
+        "from ingredient import AllIngredientsByName\n"
+        "from effect import AllEffectsByName\n"
+        "assert not AllIngredientsByName.loaded and not AllEffectsByName.loaded\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
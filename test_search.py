@@ -0,0 +1,40 @@
+import random
+from effect import AllEffectsByName, EffectSearchFields
+from ingredient import AllIngredientsByName
+from search import PrefixIndex, SearchIndex, normalize
+
+def test_normalize_strips_placeholders():
+    assert normalize("Restore {mag} points of  Health for {dur} seconds.") == "restore points of health for seconds."
+
+def test_matches_substring_search():
+    effects = list(AllEffectsByName.values())
+    index = SearchIndex(effects, EffectSearchFields)
+    rng = random.Random(5)
+    texts = [normalize(effect.name) + '\n' + normalize(effect.description) for effect in effects]
+    for _ in range(200):
+        text = rng.choice(texts)
+        start = rng.randrange(len(text))
+        term = text[start:start + rng.randint(1, 8)].strip()
+        if not term or ' ' in term or '\n' in term:
+            continue
+        expected = {position for position, other in enumerate(texts) if term in other}
+        assert set(index.search(term)) == expected, term
+    assert index.search("{mag}") == {}
+    assert index.search("dur}") == {}
+
+def test_ranks_whole_words_and_names_first():
+    ingredients = list(AllIngredientsByName.values())
+    index = SearchIndex(ingredients, {'name': (lambda i: i.name, 3.0), 'category': (lambda i: i.category, 1.0)})
+    scores = index.search("root")
+    best = max(scores, key=scores.get)
+    assert "root" in ingredients[best].name.lower().split()
+    nirnroot = [position for position, i in enumerate(ingredients) if i.name == "Nirnroot"][0]
+    assert scores[best] > scores[nirnroot]
+
+def test_prefix_suggestions():
+    index = PrefixIndex(["Blue Mountain Flower", "Mora Tapinella", "Mountain Lion", "Wheat"])
+    assert index.suggest("moun") == [(0, "Mountain Lion"), (1, "Blue Mountain Flower")]
+    assert index.suggest("MO", limit=2) == [(0, "Mora Tapinella"), (0, "Mountain Lion")]
+    assert index.suggest("blue  mou") == [(0, "Blue Mountain Flower")]
+    assert index.suggest("") == []
+    assert index.suggest("zzz") == []
@@ -0,0 +1,32 @@
+import shutil
+import pytest
+from effect import Effect
+from ingredient import Ingredient
+from snapshot import get_snapshot_filename, load_snapshot, save_snapshot
+
+@pytest.fixture
+def ingredients_file(tmp_path):
+    filename = str(tmp_path / "ingredients.yaml")
+    shutil.copy("ingredients.yaml", filename)
+    return filename
+
+def test_round_trip(ingredients_file):
+    assert load_snapshot(ingredients_file, Ingredient) is None
+    ingredients = Ingredient.from_file(ingredients_file)
+    save_snapshot(ingredients_file, ingredients)
+    assert load_snapshot(ingredients_file, Ingredient) == ingredients
+    assert Ingredient.from_file(ingredients_file) == Ingredient.from_file(ingredients_file, use_snapshot=False)
+
+def test_stale_snapshot_ignored(ingredients_file):
+    save_snapshot(ingredients_file, Ingredient.from_file(ingredients_file)[:3])
+    with open(ingredients_file, "a") as file:
+        file.write("\n")
+    assert load_snapshot(ingredients_file, Ingredient) is None
+    assert len(Ingredient.from_file(ingredients_file)) > 3
+
+def test_bad_snapshot_ignored(ingredients_file):
+    save_snapshot(ingredients_file, Ingredient.from_file(ingredients_file))
+    assert load_snapshot(ingredients_file, Effect) is None
+    with open(get_snapshot_filename(ingredients_file), "wb") as file:
+        file.write(b"not a pickle")
+    assert load_snapshot(ingredients_file, Ingredient) is None
@@ -0,0 +1,55 @@
+import pytest
+from ingredient import AllIngredientsByName, get_ingredients_by_filter
+from potion import Potion
+from vectorized import VectorTable
+
+def potion_rows(potions):
+    return [(potion.ingredients_key(), potion.active_effects, potion.value, potion.cost) for potion in potions]
+
+vectorized_test_cases = [
+    # ingredient_names
+    [],
+    ["Wheat"],
+    ["Wheat", "Blue Mountain Flower"],
+    ["Wheat", "Blue Mountain Flower", "Hagraven Feathers"],
+    ["Nirnroot", "Deathbell", "Emperor Parasol Moss", "River Betty", "Giant's Toe"],
+    ["Wheat", "Hagraven Feathers"],
+]
+
+@pytest.mark.parametrize("ingredient_names", vectorized_test_cases)
+def test_matches_brew(ingredient_names):
+    assert potion_rows(Potion.brew_vectorized(ingredient_names)) == potion_rows(Potion.brew(ingredient_names))
+
+def test_matches_brew_farmable():
+    farmable = get_ingredients_by_filter(lambda ingredient: ingredient.farmable)
+    assert potion_rows(Potion.brew_vectorized(farmable)) == potion_rows(Potion.brew(farmable))
+
+def test_values_sorted():
+    ingredients = list(AllIngredientsByName.values())[:20]
+    combos, values = VectorTable(ingredients).brew()
+    assert combos.shape == (len(values), 3)
+    assert list(values) == sorted(values, reverse=True)
+
+def test_error_handling():
+    with pytest.raises(ValueError):
+        Potion.brew_vectorized(["NonexistentIngredient"])
+    with pytest.raises(TypeError):
+        Potion.brew_vectorized(None)
+
+def test_limit():
+    ingredients = list(AllIngredientsByName.values())[:30]
+    assert potion_rows(Potion.brew_vectorized(ingredients, limit=7)) == potion_rows(Potion.brew(ingredients)[:7])
+
+def test_columns_match_rows():
+    ingredients = list(AllIngredientsByName.values())[:40]
+    table = VectorTable(ingredients)
+    combos, _ = table.brew()
+    effects, members, costs = table.effect_words(combos), table.member_words(combos), table.costs_of(combos)
+    rows = Potion.brew_lazy(ingredients).rows
+    by_combo = {row.combo: row for row in rows}
+    assert len(by_combo) == len(combos)
+    for index, combo in enumerate(combos.tolist()):
+        row = by_combo[tuple(i for i in combo if i >= 0)]
+        assert sum(int(word) << (64 * w) for w, word in enumerate(effects[index])) == row.mask
+        assert sum(int(word) << (64 * w) for w, word in enumerate(members[index])) == sum(1 << i for i in row.combo)
+        assert costs[index] == row.cost
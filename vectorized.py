@@ -0,0 +1,177 @@
+"""
+Vectorized brewing with NumPy.  Instead of looping over every combination in Python,
+the ingredient x effect tables are held as arrays and every pair (and every triple
+sharing a first ingredient) is evaluated in one batch of array operations.
+
+The potion value is accumulated slot by slot in the same order that Ingredient.combine
+produces the active effects, so the values (and therefore the sort order) are exactly
+the same as the ones produced by Potion.brew.  Costs, active effect masks and
+ingredient masks are derived from the combination array the same way, and the rows
+are only turned into PotionRows (by ArrayRows) when they're read.
+
+Usage:
+    from vectorized import VectorTable
+    table = VectorTable(list(AllIngredientsByName.values()))
+    combos, values = table.brew()
+    costs, effects = table.costs_of(combos), table.effect_words(combos)
+"""
+
+from collections.abc import Sequence
+import numpy as np
+from brewing import BrewTable, EffectBits, PotionRow, get_effect_bit, iterate
+from ingredient import Ingredient
+
+
+def get_words(bits: int) -> int:
+    """Get the number of 64 bit words a mask of `bits` bits takes (at least 1)."""
+    return max(1, -(-bits // 64))
+
+
+class ArrayRows(Sequence):
+    """Brewed rows held as NumPy columns (combinations padded with -1, values, costs),
+    read as PotionRows against a BrewTable.  Slicing returns a view of the columns
+    rather than a copy.
+    """
+
+    def __init__(self, table: BrewTable, ingredients: np.ndarray, values: np.ndarray, costs: np.ndarray):
+        self.table = table
+        self.ingredients = ingredients
+        self.values = values
+        self.costs = costs
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ArrayRows(self.table, self.ingredients[index], self.values[index], self.costs[index])
+        combo = tuple(i for i in self.ingredients[index].tolist() if i >= 0)
+        return PotionRow(combo, self.table.shared_mask(combo), float(self.values[index]), float(self.costs[index]))
+
+
+class VectorTable:
+    """A VectorTable holds the ingredient x effect tables as NumPy arrays.
+
+    has[i, bit]           True if ingredient i has the effect
+    values[i, bit]        the ingredient's value multiplier for the effect (1.0 if absent)
+    slot_bits[i, s]       the effect bit in slot s of ingredient i, in listed order
+    slot_values[i, s]     the value multiplier in slot s of ingredient i
+    costs[i]              the ingredient's cost
+    masks[i, w]           word w of the ingredient's effect mask
+
+    Slots are padded with a bit that no ingredient has, so padding is never active.
+    costs and masks have an extra zero row at the end, so the -1 that pads a pair's
+    combination adds nothing.
+    """
+
+    def __init__(self, ingredients: list[Ingredient]):
+        self.ingredients = ingredients
+        n = len(ingredients)
+        width = max((len(ingredient.effects) for ingredient in ingredients), default=0)
+        slot_bits = [[get_effect_bit(effect.name) for effect in ingredient.effects] for ingredient in ingredients]
+        padding = len(EffectBits)
+        self.has = np.zeros((n, padding + 1), dtype=bool)
+        self.values = np.ones((n, padding + 1))
+        self.slot_bits = np.full((n, width), padding, dtype=np.intp)
+        self.slot_values = np.zeros((n, width))
+        for index, ingredient in enumerate(ingredients):
+            for slot, (bit, effect) in enumerate(zip(slot_bits[index], ingredient.effects)):
+                self.has[index, bit] = True
+                self.values[index, bit] = effect.value
+                self.slot_bits[index, slot] = bit
+                self.slot_values[index, slot] = effect.value
+        self.costs = np.array([ingredient.value for ingredient in ingredients] + [0.0])
+        self.masks = np.zeros((n + 1, get_words(padding)), dtype=np.uint64)
+        for bit in range(padding):
+            self.masks[:n, bit // 64] |= self.has[:, bit].astype(np.uint64) << np.uint64(bit % 64)
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    @staticmethod
+    def _sum_slots(total: np.ndarray, terms: np.ndarray) -> np.ndarray:
+        """Add the slot terms column by column, matching Python's left-to-right sum."""
+        for slot in range(terms.shape[1]):
+            total = total + terms[:, slot]
+        return total
+
+    def pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Evaluate every pair.  Returns the (P, 2) combinations that make a potion
+        and their values, in itertools.combinations order.
+        """
+        i, j = np.triu_indices(len(self), 1)
+        bits = self.slot_bits[i]
+        active = self.has[j[:, None], bits]
+        terms = np.where(active, self.slot_values[i] * self.values[j[:, None], bits], 0.0)
+        values = self._sum_slots(np.zeros(len(i)), terms)
+        valid = active.any(axis=1)
+        return np.stack([i[valid], j[valid]], axis=1), values[valid]
+
+    def triples(self, first: int) -> tuple[np.ndarray, np.ndarray]:
+        """Evaluate every triple whose first ingredient is `first`.  Returns the (T, 3)
+        combinations in which every ingredient contributes an active effect, and their
+        values, in itertools.combinations order.
+        """
+        j, k = np.triu_indices(len(self) - first - 1, 1)
+        j += first + 1
+        k += first + 1
+        # Effects of the first ingredient that are shared with either of the others
+        bits = self.slot_bits[first]
+        active_first = self.has[j[:, None], bits] | self.has[k[:, None], bits]
+        terms_first = np.where(
+            active_first,
+            self.slot_values[first] * self.values[j[:, None], bits] * self.values[k[:, None], bits],
+            0.0,
+        )
+        # Effects of the second ingredient that only the third one shares
+        bits = self.slot_bits[j]
+        active_second = self.has[k[:, None], bits] & ~self.has[first, bits]
+        terms_second = np.where(active_second, self.slot_values[j] * self.values[k[:, None], bits], 0.0)
+        values = self._sum_slots(self._sum_slots(np.zeros(len(j)), terms_first), terms_second)
+        # Every ingredient must contribute at least one active effect
+        contributes_second = (self.has[first, bits] | self.has[k[:, None], bits]).any(axis=1)
+        bits = self.slot_bits[k]
+        contributes_third = (self.has[first, bits] | self.has[j[:, None], bits]).any(axis=1)
+        valid = active_first.any(axis=1) & contributes_second & contributes_third
+        combos = np.stack([np.full(len(j), first), j, k], axis=1)
+        return combos[valid], values[valid]
+
+    def brew(self, track=iterate) -> tuple[np.ndarray, np.ndarray]:
+        """Evaluate every pair and triple.  Returns an (M, 3) array of combinations (pairs
+        are padded with -1) and their values, sorted by value from highest to lowest.
+        Ties keep itertools.combinations order, just like Potion.brew.
+        """
+        n = len(self)
+        pair_combos, pair_values = self.pairs()
+        combos = [np.pad(pair_combos, ((0, 0), (0, 1)), constant_values=-1)]
+        values = [pair_values]
+        for first in track(range(max(n - 2, 0)), total=max(n - 2, 0), description="Brewing potions"):
+            triple_combos, triple_values = self.triples(first)
+            combos.append(triple_combos)
+            values.append(triple_values)
+        combos = np.concatenate(combos)
+        values = np.concatenate(values)
+        order = np.argsort(-values, kind='stable')
+        return combos[order], values[order]
+
+    def costs_of(self, combos: np.ndarray) -> np.ndarray:
+        """Get the cost of each combination, summed in the same order as BrewTable.cost."""
+        return self.costs[combos[:, 0]] + self.costs[combos[:, 1]] + self.costs[combos[:, 2]]
+
+    def effect_words(self, combos: np.ndarray) -> np.ndarray:
+        """Get each combination's active effect mask (the effects shared by at least two
+        of its ingredients), as 64 bit words in EffectBits order.
+        """
+        a, b, c = self.masks[combos[:, 0]], self.masks[combos[:, 1]], self.masks[combos[:, 2]]
+        return (a & b) | (a & c) | (b & c)
+
+    def member_words(self, combos: np.ndarray) -> np.ndarray:
+        """Get the mask of the ingredients each combination uses, as 64 bit words."""
+        members = np.zeros((len(combos), get_words(len(self))), dtype=np.uint64)
+        rows = np.arange(len(combos))
+        for column in range(combos.shape[1]):
+            index = combos[:, column]
+            used = index >= 0
+            np.bitwise_or.at(members, (rows[used], index[used] // 64),
+                             np.uint64(1) << (index[used] % 64).astype(np.uint64))
+        return members